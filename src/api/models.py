@@ -44,6 +44,8 @@ class PlaylistRequest(BaseModel):
     Request model for generating a mood-based playlist
     """
     mood_id: str = Field(..., description="ID of the mood entry to base playlist on")
+    mood: Optional[MoodEnum] = Field(None,
+        description="Mood to generate for; looked up from the mood entry when omitted")
     intent: IntentEnum = Field(..., 
         description="Whether to improve mood or relate to current mood")
     context: Optional[str] = Field(None, 
@@ -58,6 +60,21 @@ class PlaylistRequest(BaseModel):
             }
         }
 
+class PlaylistBatchRequest(BaseModel):
+    """
+    Request model for generating playlists for many moods at once
+    """
+    items: List[PlaylistRequest] = Field(...,
+        description="Playlists to generate",
+        min_items=1,
+        max_items=10000)
+    concurrency: int = Field(8,
+        description="Maximum playlists generated at the same time",
+        ge=1,
+        le=64)
+    stream: bool = Field(False,
+        description="Stream per-item results as newline-delimited JSON")
+
 class SongInfo(BaseModel):
     """Information about a song"""
     id: str = Field(..., description="Spotify track ID")
@@ -155,6 +172,7 @@ class MonthlyReviewResponse(BaseModel):
 class MusicServiceEnum(str, Enum):
     SPOTIFY = "spotify"
     APPLE_MUSIC = "apple_music"
+    LOCAL = "local"  # Offline recommendations from a local track catalog
     # Add more services as needed
 
 class UserPreferences(BaseModel):
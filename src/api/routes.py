@@ -1,19 +1,46 @@
-from fastapi import FastAPI, HTTPException, Depends, Query, Request, Form
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Form, Header
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.encoders import jsonable_encoder
 from typing import Dict, List, Optional
 from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError
 from .models import (
-    MoodRequest, PlaylistRequest, JournalRequest, 
+    MoodRequest, PlaylistRequest, PlaylistBatchRequest, JournalRequest, 
     MonthlyReviewResponse, IntentEnum, MoodEnum, MusicServiceEnum
 )
 from ..core.mood_tracker import MoodTracker, MoodEntry, MoodLevel
 from ..core.playlist_generator import PlaylistGenerator
+from ..services.playlist_generator import PlaylistGenerator as MoodPlaylistGenerator
 from ..core.journal import JournalManager, JournalEntry
+from ..core.columnar import MoodStore, JournalStore
+from ..core.persistence import EntryLog, PERSISTENCE_FSYNC_INTERVAL
+from ..core.repository import (
+    MoodRepository, JournalRepository, InMemoryMoodRepository, InMemoryJournalRepository,
+    MongoMoodRepository, MongoJournalRepository
+)
 from ..core.database import Database, Collections
+from ..core.indexes import ensure_indexes
 from ..services.music_service import MusicService
 from ..services.factory import MusicServiceFactory
+from ..services.executor import shutdown_executor
+from ..services.cache import (
+    RecommendationCache, InMemoryRecommendationCache, MongoRecommendationCache
+)
+from ..services.coalescing import SingleFlight
+from ..services.prefetch import RecommendationPool
+from ..services.scheduler import BACKGROUND, UpstreamRateLimited, current_priority, get_scheduler
+from ..services.circuit_breaker import CircuitOpenError
+from ..services.apple_music_service import developer_tokens
+from ..services.jobs import PlaylistJobQueue, PermanentJobError
 import os
+import json
+import base64
+import time
+import asyncio
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
@@ -29,6 +56,114 @@ async def get_db() -> AsyncIOMotorDatabase:
 mood_tracker = MoodTracker()
 journal_manager = JournalManager()
 playlist_generator = None  # Will be initialized with Spotify credentials
+recommendation_cache: Optional[RecommendationCache] = None
+recommendation_flights = SingleFlight()
+recommendation_pools: Dict[MusicServiceEnum, RecommendationPool] = {}
+background_tasks: List[asyncio.Task] = []
+playlist_jobs: Optional[PlaylistJobQueue] = None
+history_logs: Dict[str, EntryLog] = {}
+history_sync: Optional[asyncio.Task] = None
+mood_repository: MoodRepository = InMemoryMoodRepository(mood_tracker)
+journal_repository: JournalRepository = InMemoryJournalRepository(journal_manager)
+
+# How often pooled music service tokens are checked for expiry (seconds)
+TOKEN_REFRESH_INTERVAL = float(os.getenv('TOKEN_REFRESH_INTERVAL', '60'))
+
+# How long a user's top tracks/artists are reused as seeds (seconds)
+SEED_REFRESH_INTERVAL = float(os.getenv('SEED_REFRESH_INTERVAL', str(24 * 60 * 60)))
+
+# Where mood and journal entries live: 'memory' keeps them in this process
+# (persisted under PERSISTENCE_DIR; run a single worker), 'mongo' stores them
+# in MongoDB so any number of workers can serve them
+HISTORY_BACKEND = os.getenv('HISTORY_BACKEND', 'memory')
+
+# Where mood and journal history is persisted (snapshots + write-ahead logs)
+PERSISTENCE_DIR = Path(os.getenv('PERSISTENCE_DIR', 'data'))
+
+# How long clients may reuse the review of a month that is over (seconds)
+MONTHLY_REVIEW_MAX_AGE = int(os.getenv('MONTHLY_REVIEW_MAX_AGE', str(24 * 60 * 60)))
+
+# Recommendation cache settings ('memory' or 'mongo' backend)
+RECOMMENDATION_CACHE_BACKEND = os.getenv('RECOMMENDATION_CACHE_BACKEND', 'memory')
+RECOMMENDATION_CACHE_SIZE = int(os.getenv('RECOMMENDATION_CACHE_SIZE', '256'))
+RECOMMENDATION_CACHE_TTL = float(os.getenv('RECOMMENDATION_CACHE_TTL', '600'))
+
+# Local catalog used when the remote provider is slow or down
+LOCAL_CATALOG_PATH = os.getenv('LOCAL_CATALOG_PATH')
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', '5'))
+
+# Services to keep pre-fetched tracklists for (comma separated, e.g. "spotify")
+PREFETCH_SERVICES = [s for s in os.getenv('PREFETCH_SERVICES', '').split(',') if s]
+PREFETCH_DEPTH = int(os.getenv('PREFETCH_DEPTH', '3'))
+PREFETCH_INTERVAL = float(os.getenv('PREFETCH_INTERVAL', '60'))
+
+# Playlists written per insert_many call by POST /playlists/batch
+PLAYLIST_BATCH_INSERT_SIZE = int(os.getenv('PLAYLIST_BATCH_INSERT_SIZE', '100'))
+
+# Playlist job workers in this process (0 when running `python -m src.api.worker`)
+PLAYLIST_JOB_WORKERS = int(os.getenv('PLAYLIST_JOB_WORKERS', '4'))
+PLAYLIST_JOB_MAX_ATTEMPTS = int(os.getenv('PLAYLIST_JOB_MAX_ATTEMPTS', '3'))
+
+def get_playlist_generator(service_type: MusicServiceEnum) -> MoodPlaylistGenerator:
+    """Build a playlist generator on top of the pooled music service"""
+    music_service = MusicServiceFactory.get_service(service_type)
+    fallback = None
+    if LOCAL_CATALOG_PATH and service_type != MusicServiceEnum.LOCAL:
+        fallback = MusicServiceFactory.get_service(MusicServiceEnum.LOCAL)
+    return MoodPlaylistGenerator(
+        music_service,
+        cache=recommendation_cache,
+        flights=recommendation_flights,
+        fallback=fallback,
+        timeout=UPSTREAM_TIMEOUT if fallback else None,
+        pool=recommendation_pools.get(service_type)
+    )
+
+async def build_playlist_record(db: AsyncIOMotorDatabase, payload: Dict) -> Dict:
+    """Generate a playlist for a request payload and build its stored document"""
+    mood = payload.get('mood')
+    if mood is None:
+        mood_entry = await db[Collections.MOODS].find_one({"_id": ObjectId(payload['mood_id'])})
+        if not mood_entry:
+            raise LookupError(f"Mood entry {payload['mood_id']} not found")
+        mood = mood_entry['mood']
+    
+    service_type = MusicServiceEnum(payload['service_type'])
+    generator = get_playlist_generator(service_type)
+    playlist = await generator.generate_mood_playlist(
+        mood=MoodEnum(mood),
+        intent=IntentEnum(payload['intent']),
+        context=payload.get('context')
+    )
+    if playlist['playlist_id'] is None:
+        # The provider's circuit was open; fail so jobs retry and batches
+        # report the item instead of storing a playlist that does not exist
+        raise CircuitOpenError(service_type.value)
+    
+    return {
+        'mood_id': payload['mood_id'],
+        'service_type': service_type,
+        'playlist_data': playlist,
+        'timestamp': datetime.now()
+    }
+
+async def run_playlist_job(payload: Dict) -> Dict:
+    """Generate a playlist for a queued job and store it"""
+    db = await Database.get_db()
+    try:
+        record = await build_playlist_record(db, payload)
+    except (InvalidId, LookupError) as e:
+        # A malformed or unknown mood id will not fix itself on retry
+        raise PermanentJobError(str(e)) from e
+    await db[Collections.PLAYLISTS].insert_one(record)
+    return record['playlist_data']
+
+def rate_limited_error(error: UpstreamRateLimited) -> HTTPException:
+    """Surface an upstream 429 to the client instead of a generic 400"""
+    headers = {}
+    if error.retry_after is not None:
+        headers["Retry-After"] = str(int(error.retry_after))
+    return HTTPException(status_code=429, detail=str(error), headers=headers)
 
 # Mount static files and templates
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,7 +173,7 @@ app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="stat
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on startup"""
-    global playlist_generator
+    global playlist_generator, recommendation_cache, playlist_jobs
     # Load Spotify credentials from environment variables or config
     spotify_credentials = {
         "client_id": "your_client_id",
@@ -46,12 +181,109 @@ async def startup_event():
         "redirect_uri": "your_redirect_uri",
         "scope": "playlist-modify-private playlist-modify-public user-top-read"
     }
-    playlist_generator = PlaylistGenerator(spotify_credentials)
+    playlist_generator = PlaylistGenerator(
+        spotify_credentials,
+        seed_refresh_interval=SEED_REFRESH_INTERVAL
+    )
     await Database.connect_db()
+    # Create any declared index that is missing (no-op once they exist)
+    await ensure_indexes(await Database.get_db())
+    
+    if RECOMMENDATION_CACHE_BACKEND == 'mongo':
+        db = await Database.get_db()
+        recommendation_cache = MongoRecommendationCache(
+            db[Collections.RECOMMENDATIONS],
+            maxsize=RECOMMENDATION_CACHE_SIZE,
+            ttl=RECOMMENDATION_CACHE_TTL
+        )
+    else:
+        recommendation_cache = InMemoryRecommendationCache(
+            maxsize=RECOMMENDATION_CACHE_SIZE,
+            ttl=RECOMMENDATION_CACHE_TTL
+        )
+    
+    db = await Database.get_db()
+    playlist_jobs = PlaylistJobQueue(
+        db[Collections.PLAYLIST_JOBS],
+        run_playlist_job,
+        workers=PLAYLIST_JOB_WORKERS,
+        max_attempts=PLAYLIST_JOB_MAX_ATTEMPTS
+    )
+    playlist_jobs.start()
+    
+    background_tasks.append(asyncio.create_task(
+        MusicServiceFactory.run_token_refresher(TOKEN_REFRESH_INTERVAL)
+    ))
+    
+    # Keep candidate tracklists warm for every mood/intent combination
+    for name in PREFETCH_SERVICES:
+        service_type = MusicServiceEnum(name)
+        pool = RecommendationPool(
+            lambda service_type=service_type: MusicServiceFactory.get_service(service_type),
+            depth=PREFETCH_DEPTH,
+            refill_interval=PREFETCH_INTERVAL
+        )
+        recommendation_pools[service_type] = pool
+        background_tasks.append(asyncio.create_task(pool.run()))
+
+@app.on_event("startup")
+async def open_history():
+    """
+    Set up mood and journal storage. With the memory backend history is
+    restored from disk and new entries are persisted there; this is kept out
+    of startup_event so job worker processes never write the logs. The logs
+    support a single API worker: a second process opening PERSISTENCE_DIR
+    fails to start (use HISTORY_BACKEND=mongo to run several).
+    """
+    global mood_repository, journal_repository, history_sync
+    if HISTORY_BACKEND == 'mongo':
+        db = await Database.get_db()
+        mood_repository = MongoMoodRepository(db[Collections.MOODS])
+        journal_repository = MongoJournalRepository(
+            db[Collections.JOURNALS],
+            top_songs=journal_manager.top_songs,
+            top_themes=journal_manager.top_themes
+        )
+        return
+    
+    history_logs["moods"] = EntryLog(PERSISTENCE_DIR / "moods", MoodStore, MoodEntry.from_dict)
+    history_logs["journal"] = EntryLog(
+        PERSISTENCE_DIR / "journal", JournalStore, JournalEntry.from_dict
+    )
+    mood_tracker.attach_log(history_logs["moods"])
+    journal_manager.attach_log(history_logs["journal"])
+    # Entries are otherwise only fsynced by the next add, however long that takes
+    history_sync = asyncio.create_task(sync_history_logs(PERSISTENCE_FSYNC_INTERVAL))
+    # Index the restored history on a worker thread rather than in the first request
+    for repository in (mood_repository, journal_repository):
+        background_tasks.append(asyncio.create_task(repository.ready()))
+
+async def sync_history_logs(interval: float) -> None:
+    """Background loop that fsyncs logged entries the fsync policy left pending"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        for log in history_logs.values():
+            if log.sync_due():
+                await loop.run_in_executor(None, log.sync)
+
+@app.on_event("shutdown")
+async def close_history():
+    if history_sync is not None:
+        history_sync.cancel()
+    # Fold the logs into snapshots so the next start has no tail to replay
+    loop = asyncio.get_running_loop()
+    for log in history_logs.values():
+        await loop.run_in_executor(None, log.close)
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    if playlist_jobs:
+        await playlist_jobs.stop()
     await Database.close_db()
+    shutdown_executor()
 
 @app.get("/")
 async def home(request: Request):
@@ -64,6 +296,24 @@ async def home(request: Request):
         }
     )
 
+@app.get("/metrics")
+async def get_metrics():
+    """Expose internal performance counters"""
+    return {
+        "recommendation_cache": recommendation_cache.stats() if recommendation_cache else None,
+        "recommendation_coalescing": recommendation_flights.stats(),
+        "upstream": get_scheduler().stats(),
+        "apple_music_tokens": developer_tokens.stats(),
+        "track_loaders": MusicServiceFactory.loader_stats(),
+        "services": MusicServiceFactory.service_stats(),
+        "playlist_jobs": await playlist_jobs.stats() if playlist_jobs else None,
+        "recommendation_pools": {
+            service_type.value: pool.stats()
+            for service_type, pool in recommendation_pools.items()
+        },
+        "history": {name: log.stats() for name, log in history_logs.items()}
+    }
+
 @app.post("/mood")
 async def create_mood_and_playlist(
     request: Request,
@@ -79,26 +329,14 @@ async def create_mood_and_playlist(
             context=context
         )
         
-        # Get service credentials
-        credentials = {}
+        # Generate playlist
         if service_type == "spotify":
-            credentials = {
-                'client_id': os.getenv('SPOTIFY_CLIENT_ID'),
-                'client_secret': os.getenv('SPOTIFY_CLIENT_SECRET'),
-                'redirect_uri': os.getenv('SPOTIFY_REDIRECT_URI')
-            }
             service_enum = MusicServiceEnum.SPOTIFY
+        elif service_type == "local":
+            service_enum = MusicServiceEnum.LOCAL
         else:
-            credentials = {
-                'key_id': os.getenv('APPLE_MUSIC_KEY_ID'),
-                'team_id': os.getenv('APPLE_MUSIC_TEAM_ID'),
-                'secret_key': os.getenv('APPLE_MUSIC_SECRET_KEY')
-            }
             service_enum = MusicServiceEnum.APPLE_MUSIC
-        
-        # Generate playlist
-        music_service = MusicServiceFactory.get_service(service_enum, credentials)
-        generator = PlaylistGenerator(music_service)
+        generator = get_playlist_generator(service_enum)
         playlist = await generator.generate_mood_playlist(
             mood=mood,
             intent=IntentEnum.IMPROVE,
@@ -113,47 +351,242 @@ async def create_mood_and_playlist(
                 "mood": mood
             }
         )
+    except UpstreamRateLimited as e:
+        raise rate_limited_error(e)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/playlists")
+@app.get("/mood/stream")
+async def stream_mood_playlist(
+    mood: MoodEnum,
+    service_type: MusicServiceEnum,
+    intent: IntentEnum = IntentEnum.IMPROVE,
+    context: Optional[str] = Query(None, max_length=500)
+):
+    """
+    Server-Sent Events version of the mood -> playlist flow: recommended
+    tracks are pushed as `track` events before the playlist is created,
+    followed by a `playlist` event (or an `error` event)
+    """
+    async def events():
+        try:
+            # Inside the stream so a service that cannot be set up is
+            # reported as an `error` event rather than a 500
+            generator = get_playlist_generator(service_type)
+            async for event, data in generator.stream_mood_playlist(
+                mood=mood,
+                intent=intent,
+                context=context
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/playlists", status_code=202)
 async def create_mood_playlist(
     request: PlaylistRequest,
     service_type: MusicServiceEnum,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
+    """Queue playlist generation and return the job to poll"""
     try:
-        # Get appropriate credentials based on service type
-        if service_type == MusicServiceEnum.SPOTIFY:
-            credentials = {
-                'client_id': os.getenv('SPOTIFY_CLIENT_ID'),
-                'client_secret': os.getenv('SPOTIFY_CLIENT_SECRET'),
-                'redirect_uri': os.getenv('SPOTIFY_REDIRECT_URI')
-            }
-        else:  # Apple Music
-            credentials = {
-                'key_id': os.getenv('APPLE_MUSIC_KEY_ID'),
-                'team_id': os.getenv('APPLE_MUSIC_TEAM_ID'),
-                'secret_key': os.getenv('APPLE_MUSIC_SECRET_KEY')
+        job = await playlist_jobs.enqueue(
+            {
+                'mood_id': request.mood_id,
+                'mood': request.mood,
+                'intent': request.intent,
+                'context': request.context,
+                'service_type': service_type
+            },
+            idempotency_key=idempotency_key
+        )
+        job_id = str(job['_id'])
+        return JSONResponse(
+            status_code=202,
+            content={
+                "job_id": job_id,
+                "status": job['status'],
+                "status_url": f"/playlists/jobs/{job_id}"
             }
-        
-        music_service = MusicServiceFactory.get_service(service_type, credentials)
-        generator = PlaylistGenerator(music_service)
-        
-        playlist = await generator.generate_mood_playlist(
-            mood=request.mood,
-            intent=request.intent,
-            context=request.context
         )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def run_playlist_batch(
+    request: PlaylistBatchRequest,
+    service_type: MusicServiceEnum,
+    db: AsyncIOMotorDatabase
+):
+    """
+    Generate playlists for every item with bounded concurrency, yielding
+    per-item results as they complete and a summary at the end.
+    Generated playlists are written with insert_many in batches; they are
+    reported once their batch has been inserted.
+    """
+    # Bulk generation yields upstream capacity to interactive requests;
+    # the per-item tasks inherit the priority from this context
+    current_priority.set(BACKGROUND)
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(request.concurrency)
+    
+    async def generate(index: int, item: PlaylistRequest):
+        async with semaphore:
+            try:
+                record = await build_playlist_record(db, {
+                    'mood_id': item.mood_id,
+                    'mood': item.mood,
+                    'intent': item.intent,
+                    'context': item.context,
+                    'service_type': service_type
+                })
+                return index, record, None
+            except Exception as e:
+                return index, None, str(e)
+    
+    tasks = [asyncio.ensure_future(generate(i, item)) for i, item in enumerate(request.items)]
+    pending_records = []
+    succeeded = failed = insert_errors = 0
+    
+    async def flush():
+        """Insert the pending records and return a result per item"""
+        nonlocal succeeded, insert_errors
+        batch = pending_records[:]
+        pending_records.clear()
+        errors = {}
+        try:
+            await db[Collections.PLAYLISTS].insert_many(
+                [record for _, record in batch], ordered=False
+            )
+        except BulkWriteError as e:
+            # Unordered inserts: every record not listed here was written
+            errors = {
+                error['index']: error.get('errmsg', "insert failed")
+                for error in e.details.get('writeErrors', [])
+            }
+        except Exception as e:
+            errors = {i: str(e) for i in range(len(batch))}
         
-        await db[Collections.PLAYLISTS].insert_one({
-            'mood_id': request.mood_id,
-            'service_type': service_type,
-            'playlist_data': playlist,
-            'timestamp': datetime.now()
-        })
+        results = []
+        for i, (index, record) in enumerate(batch):
+            if i in errors:
+                insert_errors += 1
+                results.append({
+                    "index": index,
+                    "mood_id": record['mood_id'],
+                    "status": "error",
+                    "error": errors[i]
+                })
+            else:
+                succeeded += 1
+                results.append({
+                    "index": index,
+                    "mood_id": record['mood_id'],
+                    "status": "success",
+                    "playlist_id": record['playlist_data']['playlist_id']
+                })
+        return results
+    
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, record, error = await next_done
+            if error is None:
+                # Reported once the record is actually stored
+                pending_records.append((index, record))
+                if len(pending_records) >= PLAYLIST_BATCH_INSERT_SIZE:
+                    for result in await flush():
+                        yield result
+            else:
+                failed += 1
+                yield {
+                    "index": index,
+                    "mood_id": request.items[index].mood_id,
+                    "status": "error",
+                    "error": error
+                }
+        if pending_records:
+            for result in await flush():
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    elapsed = time.perf_counter() - started
+    yield {
+        "summary": {
+            "total": len(request.items),
+            "succeeded": succeeded,
+            "failed": failed,
+            "insert_errors": insert_errors,
+            "elapsed_seconds": elapsed,
+            "playlists_per_second": len(request.items) / elapsed if elapsed else 0
+        }
+    }
+
+@app.post("/playlists/batch")
+async def create_mood_playlists_batch(
+    request: PlaylistBatchRequest,
+    service_type: MusicServiceEnum,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Generate playlists for many stored moods at once.
+    With `stream` set, results are streamed as newline-delimited JSON.
+    """
+    results = run_playlist_batch(request, service_type, db)
+    if request.stream:
+        async def lines():
+            async for result in results:
+                yield json.dumps(result, default=str) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    try:
+        items = [result async for result in results]
+        summary = items.pop()["summary"]
+        return {"results": sorted(items, key=lambda r: r["index"]), **summary}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/playlists/jobs/{job_id}")
+async def get_playlist_job(job_id: str):
+    """Get the status (and result, once done) of a playlist job"""
+    try:
+        job = await playlist_jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
         
-        return playlist
+        return {
+            "job_id": job_id,
+            "status": job['status'],
+            "attempts": job['attempts'],
+            "result": job['result'],
+            "error": job['error']
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/tracks")
+async def get_tracks(
+    service_type: MusicServiceEnum,
+    ids: List[str] = Query(..., description="Track IDs to look up")
+):
+    """Get metadata for several tracks in as few upstream calls as possible"""
+    try:
+        loader = MusicServiceFactory.get_track_loader(service_type)
+        return {"tracks": await loader.load_many(ids)}
+    except UpstreamRateLimited as e:
+        raise rate_limited_error(e)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -165,41 +598,97 @@ async def save_journal(request: JournalRequest):
     """
     try:
         # Find the mood entry
-        entries = [e for e in mood_tracker.entries 
-                  if str(e.timestamp.timestamp()) == request.mood_id]
-        if not entries:
+        mood_entry = await mood_repository.get(request.mood_id)
+        if mood_entry is None:
             raise HTTPException(status_code=404, detail="Mood entry not found")
         
         journal_entry = JournalEntry(
-            mood_entry=entries[0],
+            mood_entry=mood_entry,
             text=request.text,
             tags=request.tags or []
         )
         
         # Add any liked songs or memorable lyrics
         for song in request.liked_songs or []:
-            journal_entry.add_liked_song(song)
+            # JSON-safe values only (e.g. URLs as str) for the log and BSON
+            journal_entry.add_liked_song(jsonable_encoder(song))
         
         for lyric in request.memorable_lyrics or []:
             journal_entry.add_memorable_lyrics(
-                lyrics=lyric["text"],
-                song_title=lyric["song"]
+                lyrics=lyric.text,
+                song_title=lyric.song
             )
         
-        journal_manager.add_entry(journal_entry)
-        return {"status": "success"}
+        entry_id = await journal_repository.add(journal_entry)
+        return {"status": "success", "entry_id": entry_id}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def build_monthly_review(summary: Dict) -> MonthlyReviewResponse:
+    """Shape a journal monthly summary as the review response"""
+    distribution = summary["mood_distribution"]
+    total = sum(distribution.values())
+    return MonthlyReviewResponse(
+        mood_trends={
+            "average_mood": sum(
+                MoodLevel[mood].value * count for mood, count in distribution.items()
+            ) / total if total else 0,
+            "mood_distribution": distribution
+        },
+        favorite_songs=summary["favorite_songs"],
+        memorable_lyrics=[
+            {"text": lyric["lyrics"], "song": lyric["song"], "artist": lyric.get("artist")}
+            for lyric in summary["memorable_lyrics"]
+        ],
+        common_themes=summary["common_themes"]
+    )
+
+def review_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate the review request's conditional headers (If-None-Match wins)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in [
+            tag.strip() for tag in if_none_match.split(",")
+        ]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since is not None and last_modified.replace(microsecond=0) <= since
+    return False
+
 @app.get("/monthly-review/{year}/{month}", response_model=MonthlyReviewResponse)
-async def get_monthly_review(year: int, month: int):
+async def get_monthly_review(year: int, month: int, request: Request, response: Response):
     """
     Get monthly mood and music review
     This generates the monthly review visualization shown in your prototype
     """
     try:
-        summary = journal_manager.get_monthly_summary(year, month)
-        return MonthlyReviewResponse(**summary)
+        # Validators change whenever an entry for the month is added, so
+        # repeat views can be answered without building the summary
+        version, last_modified = await journal_repository.month_version(year, month)
+        stamp = int(last_modified.timestamp()) if last_modified else 0
+        headers = {
+            "ETag": f'"{year}-{month:02d}-{version}-{stamp}"',
+            # Closed months only change through backdated entries
+            "Cache-Control": (
+                f"private, max-age={MONTHLY_REVIEW_MAX_AGE}"
+                if journal_manager.is_sealed(year, month) else "private, no-cache"
+            )
+        }
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        
+        if review_not_modified(request, headers["ETag"], last_modified):
+            return Response(status_code=304, headers=headers)
+        
+        summary = await journal_repository.monthly_summary(
+            year, month, version=(version, last_modified)
+        )
+        response.headers.update(headers)
+        return build_monthly_review(summary)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -211,12 +700,10 @@ async def share_entry(entry_id: str):
     """
     try:
         # Find the journal entry
-        entries = [e for e in journal_manager.entries 
-                  if str(e.timestamp.timestamp()) == entry_id]
-        if not entries:
+        entry = await journal_repository.get(entry_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Entry not found")
         
-        entry = entries[0]
         # Create anonymized version for sharing
         shared_data = {
             "mood": entry.mood_entry.mood.name,
@@ -228,6 +715,32 @@ async def share_entry(entry_id: str):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def encode_mood_cursor(mood: Dict) -> str:
+    """Opaque cursor pointing just past a mood document in (timestamp, _id) order"""
+    key = {"t": mood["timestamp"].isoformat(), "id": str(mood["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_mood_cursor(cursor: str) -> Dict:
+    """
+    Build the seek filter selecting moods after a cursor. The $or alone
+    gives the planner no bound on timestamp; the top-level $lte lets it seek
+    the (timestamp, _id) index to the cursor instead of scanning from the
+    newest entry.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        timestamp = datetime.fromisoformat(key["t"])
+        last_id = ObjectId(key["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "timestamp": {"$lte": timestamp},
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": last_id}}
+        ]
+    }
+
 @app.get("/moods")
 async def get_moods(
     start_date: Optional[datetime] = Query(None, description="Filter moods from this date"),
@@ -235,37 +748,55 @@ async def get_moods(
     mood_type: Optional[MoodEnum] = Query(None, description="Filter by specific mood"),
     tags: Optional[List[str]] = Query(None, description="Filter by tags"),
     limit: int = Query(10, description="Number of entries to return", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[List[str]] = Query(None, description="Fields to return (default: all)"),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Get mood entries with filtering options"""
+    """
+    Get mood entries with filtering options, newest first.
+    Pages are addressed by (timestamp, _id) cursors rather than offsets, so
+    every page costs the same and entries added meanwhile never shift them.
+    """
     try:
-        # Build query filter
-        filter_query = {}
-        if start_date or end_date:
-            filter_query["timestamp"] = {}
-            if start_date:
-                filter_query["timestamp"]["$gte"] = start_date
-            if end_date:
-                filter_query["timestamp"]["$lte"] = end_date
+        # Build query filter; moods without a timestamp have no place in
+        # the (timestamp, _id) order, so they are not listed
+        filter_query = {"timestamp": {"$type": "date"}}
+        if start_date:
+            filter_query["timestamp"]["$gte"] = start_date
+        if end_date:
+            filter_query["timestamp"]["$lte"] = end_date
         
         if mood_type:
             filter_query["mood"] = mood_type
             
         if tags:
             filter_query["tags"] = {"$in": tags}
+        
+        if cursor:
+            filter_query = {"$and": [filter_query, decode_mood_cursor(cursor)]}
+        
+        # The seek key is always fetched so the next cursor can be built
+        projection = None
+        if fields:
+            projection = {field: 1 for field in fields}
+            projection["timestamp"] = 1
             
-        # Execute query
-        cursor = db[Collections.MOODS].find(filter_query)
-        cursor = cursor.sort("timestamp", -1).limit(limit)
+        # Execute query; one extra row tells whether another page exists
+        results = db[Collections.MOODS].find(filter_query, projection)
+        results = results.sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1)
         
         # Convert to list
-        moods = await cursor.to_list(length=limit)
+        moods = await results.to_list(length=limit + 1)
+        next_cursor = encode_mood_cursor(moods[limit - 1]) if len(moods) > limit else None
+        moods = moods[:limit]
         
         # Convert ObjectId to string
         for mood in moods:
             mood["_id"] = str(mood["_id"])
             
-        return {"moods": moods}
+        return {"moods": moods, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -293,6 +824,7 @@ async def update_mood(
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Mood not found")
+        mood_repository.forget(mood_id)
             
         return {
             "status": "success",
@@ -312,6 +844,7 @@ async def delete_mood(
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Mood not found")
+        mood_repository.forget(mood_id)
             
         return {
             "status": "success",
@@ -362,6 +895,9 @@ async def setup_spotify(
         # Reload environment variables
         load_dotenv(env_path, override=True)
         
+        # Drop pooled Spotify clients built with the old credentials
+        MusicServiceFactory.invalidate(MusicServiceEnum.SPOTIFY)
+        
         return templates.TemplateResponse(
             "index.html",
             {
@@ -0,0 +1,28 @@
+"""
+Standalone playlist job worker.
+
+Runs the same startup as the API (database, music services, caches) and
+processes queued playlist jobs without serving HTTP:
+
+    PLAYLIST_JOB_WORKERS=8 python -m src.api.worker
+
+Run the API itself with PLAYLIST_JOB_WORKERS=0 to leave all jobs to
+worker processes.
+"""
+import asyncio
+from .routes import startup_event, shutdown_event, PLAYLIST_JOB_WORKERS
+
+async def main():
+    if PLAYLIST_JOB_WORKERS <= 0:
+        raise SystemExit("Set PLAYLIST_JOB_WORKERS to a positive number of workers")
+    await startup_event()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await shutdown_event()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,532 @@
+import json
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from .mood_tracker import MoodEntry, MoodLevel
+from .journal import JournalEntry
+from .entry import make_entry_id
+
+# Timestamps are stored as int64 microseconds since this naive epoch, which
+# round-trips the naive local datetimes the trackers use exactly.
+# Timezone-aware timestamps are stored (and read back) as naive UTC.
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+def to_micros(timestamp: datetime) -> int:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // MICROSECOND
+
+def from_micros(micros: int) -> datetime:
+    return EPOCH + timedelta(microseconds=int(micros))
+
+class Column:
+    """Growable NumPy array with amortized O(1) appends"""
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+        self._data = np.empty(16, dtype=self.dtype)
+        self.size = 0
+
+    @classmethod
+    def wrap(cls, data: np.ndarray) -> 'Column':
+        """
+        Use an existing array as the column's contents without copying.
+        Read-only arrays (e.g. memory-mapped) are copied on the first append.
+        """
+        column = cls(data.dtype)
+        column._data = data
+        column.size = len(data)
+        return column
+
+    def _reserve(self, size: int) -> None:
+        if size <= len(self._data) and self._data.flags.writeable:
+            return
+        data = np.empty(max(size, 2 * len(self._data), 16), dtype=self.dtype)
+        data[:self.size] = self._data[:self.size]
+        self._data = data
+
+    def append(self, value: Any) -> None:
+        self._reserve(self.size + 1)
+        self._data[self.size] = value
+        self.size += 1
+
+    def extend(self, values: Iterable) -> None:
+        values = np.asarray(list(values) if not isinstance(values, np.ndarray) else values,
+                            dtype=self.dtype)
+        self._reserve(self.size + len(values))
+        self._data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:self.size]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+class RaggedColumn:
+    """Variable-length rows stored as one flat array plus row offsets"""
+    def __init__(self, dtype, values: Optional[np.ndarray] = None,
+                 offsets: Optional[np.ndarray] = None):
+        self.flat = Column(dtype) if values is None else Column.wrap(values)
+        if offsets is None:
+            self.offsets = Column(np.int64)
+            self.offsets.append(0)
+        else:
+            self.offsets = Column.wrap(offsets)
+
+    def append(self, row: Iterable) -> None:
+        self.flat.extend(row)
+        self.offsets.append(len(self.flat))
+
+    def row(self, i: int) -> np.ndarray:
+        offsets = self.offsets.values
+        return self.flat.values[offsets[i]:offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+def _ragged_rows(column: RaggedColumn, values: List, rows: List[int]) -> List[List]:
+    """Each of `rows` of a ragged column as a new list, with ids mapped through `values`"""
+    offsets = column.offsets.values.tolist()
+    flat = [values[i] for i in column.flat.values.tolist()]
+    return [flat[offsets[row]:offsets[row + 1]] for row in rows]
+
+class StringTable:
+    """Interned strings; each distinct string is stored once and referred to by id"""
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings: List[str] = list(strings)
+        self._ids: Dict[str, int] = {s: i for i, s in enumerate(self.strings)}
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def intern_optional(self, value: Optional[str]) -> int:
+        return -1 if value is None else self.intern(value)
+
+    def lookup(self, string_id: int) -> Optional[str]:
+        return None if string_id < 0 else self.strings[string_id]
+
+    def lookup_all(self, string_ids: np.ndarray) -> List[str]:
+        return [self.strings[i] for i in string_ids.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def lookup_table(self) -> List[Optional[str]]:
+        """Strings by id, with id -1 mapping to None, for bulk lookups"""
+        return self.strings + [None]
+
+class ColumnarStore:
+    """
+    Base for append-only, array-backed entry stores. Rows are kept in arrival
+    order; range queries go through the timestamp column, sorted lazily if
+    entries ever arrive out of time order.
+    """
+    def __init__(self):
+        self.timestamps = Column(np.int64)
+        self.strings = StringTable()
+        self._order: Optional[np.ndarray] = None
+        self._in_order = True
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def _datetimes(self, rows: np.ndarray) -> List[datetime]:
+        # One vectorized conversion instead of from_micros() per row
+        return self.timestamps.values[rows].astype('datetime64[us]').tolist()
+
+    def _append_timestamp(self, timestamp: datetime) -> None:
+        micros = to_micros(timestamp)
+        if len(self.timestamps) and micros < self.timestamps[len(self.timestamps) - 1]:
+            self._in_order = False
+        self.timestamps.append(micros)
+        self._order = None
+
+    def order(self) -> np.ndarray:
+        """Row numbers in time order (ties in arrival order)"""
+        if self._order is None or len(self._order) != len(self):
+            if self._in_order:
+                self._order = np.arange(len(self))
+            else:
+                self._order = np.argsort(self.timestamps.values, kind='stable')
+        return self._order
+
+    def rows_between(self, start: datetime, end: datetime, include_end: bool = True) -> np.ndarray:
+        """Row numbers with start <= timestamp <= end (or < end), in time order"""
+        order = self.order()
+        timestamps = self.timestamps.values
+        if not self._in_order:
+            timestamps = timestamps[order]
+        lo = np.searchsorted(timestamps, to_micros(start), side='left')
+        hi = np.searchsorted(timestamps, to_micros(end), side='right' if include_end else 'left')
+        return order[lo:hi]
+
+    def find(self, entry_id: str) -> Optional[int]:
+        """Row number of the first entry recorded for an id"""
+        try:
+            micros = to_micros(datetime.fromtimestamp(float(entry_id)))
+        except (ValueError, OverflowError, OSError):
+            return None
+        # The id is a float; look one microsecond either side for rounding
+        for row in self.rows_between(from_micros(micros - 1), from_micros(micros + 1)):
+            if make_entry_id(from_micros(self.timestamps[row])) == entry_id:
+                return int(row)
+        return None
+
+    def columns(self) -> Dict[str, Column]:
+        """All array columns by name (ragged columns as name.flat / name.offsets)"""
+        columns = {}
+        for name, value in vars(self).items():
+            if isinstance(value, Column):
+                columns[name] = value
+            elif isinstance(value, RaggedColumn):
+                columns[f'{name}.flat'] = value.flat
+                columns[f'{name}.offsets'] = value.offsets
+        return columns
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the store's arrays and string table"""
+        return (
+            sum(column.values.nbytes for column in self.columns().values())
+            + sum(s.__sizeof__() for s in self.strings.strings)
+        )
+
+    def save(self, directory: Path) -> None:
+        """Write one .npy file per column plus a meta.json to a new directory"""
+        directory = Path(directory)
+        directory.mkdir(parents=True)
+        for name, column in self.columns().items():
+            np.save(directory / f'{name}.npy', column.values)
+        with open(directory / 'meta.json', 'w') as f:
+            json.dump(self._meta(), f)
+
+    def _meta(self) -> Dict:
+        return {'rows': len(self), 'in_order': self._in_order, 'strings': self.strings.strings}
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> 'ColumnarStore':
+        """
+        Load a store written by save(). With mmap the columns are mapped
+        read-only instead of read, so loading costs O(1) in the row count;
+        a column is copied into memory the first time it is appended to.
+        """
+        directory = Path(directory)
+        with open(directory / 'meta.json') as f:
+            meta = json.load(f)
+        store = cls()
+        store.strings = StringTable(meta['strings'])
+        store._in_order = meta['in_order']
+        for name in store.columns():
+            column = Column.wrap(np.load(directory / f'{name}.npy', mmap_mode='r' if mmap else None))
+            attr, _, part = name.partition('.')
+            setattr(getattr(store, attr) if part else store, part or attr, column)
+        store._load_extra(directory, meta, mmap)
+        return store
+
+    def _load_extra(self, directory: Path, meta: Dict, mmap: bool) -> None:
+        pass
+
+class MoodRow:
+    """Read-only view of one row of a MoodStore, shaped like a MoodEntry"""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store: 'MoodStore', row: int):
+        self.store = store
+        self.row = row
+
+    @property
+    def mood(self) -> MoodLevel:
+        return MoodLevel(int(self.store.moods[self.row]))
+
+    @property
+    def timestamp(self) -> datetime:
+        return from_micros(self.store.timestamps[self.row])
+
+    @property
+    def context(self) -> Optional[str]:
+        return self.store.strings.lookup(int(self.store.contexts[self.row]))
+
+    @property
+    def tags(self) -> List[str]:
+        return self.store.strings.lookup_all(self.store.tags.row(self.row))
+
+    @property
+    def activities(self) -> List[str]:
+        return self.store.strings.lookup_all(self.store.activities.row(self.row))
+
+    @property
+    def playlist_id(self) -> Optional[str]:
+        return self.store.strings.lookup(int(self.store.playlist_ids[self.row]))
+
+    @property
+    def entry_id(self) -> str:
+        return make_entry_id(self.timestamp)
+
+    def to_dict(self) -> Dict:
+        return self.to_entry().to_dict()
+
+    def to_entry(self) -> MoodEntry:
+        """Materialize the row as a MoodEntry"""
+        return MoodEntry(
+            mood=self.mood,
+            timestamp=self.timestamp,
+            context=self.context,
+            tags=self.tags,
+            activities=self.activities,
+            playlist_id=self.playlist_id
+        )
+
+class MoodStore(ColumnarStore):
+    """
+    Columnar mood history: int64 timestamps, int8 mood codes and interned
+    context/tag/activity ids, a few dozen bytes per entry instead of a
+    MoodEntry object graph. Linked journal entries are not stored.
+    """
+    def __init__(self):
+        super().__init__()
+        self.moods = Column(np.int8)
+        self.contexts = Column(np.int32)
+        self.playlist_ids = Column(np.int32)
+        self.tags = RaggedColumn(np.int32)
+        self.activities = RaggedColumn(np.int32)
+
+    def add_entry(self, entry: MoodEntry) -> None:
+        """Add a new mood entry"""
+        self._append_timestamp(entry.timestamp)
+        self.moods.append(entry.mood.value)
+        self.contexts.append(self.strings.intern_optional(entry.context))
+        self.playlist_ids.append(self.strings.intern_optional(entry.playlist_id))
+        self.tags.append([self.strings.intern(tag) for tag in entry.tags])
+        self.activities.append([self.strings.intern(a) for a in entry.activities])
+
+    def row(self, i: int) -> MoodRow:
+        return MoodRow(self, i)
+
+    def to_entries(self, rows: Optional[np.ndarray] = None) -> List[MoodEntry]:
+        """
+        Materialize rows (default: all, in time order) as MoodEntry objects.
+        Works column by column, which is several times faster than calling
+        to_entry() on each row view.
+        """
+        if rows is None:
+            rows = self.order()
+        row_list = rows.tolist()
+        strings = self.strings.lookup_table()
+        levels = {level.value: level for level in MoodLevel}
+        return [
+            MoodEntry(
+                mood=levels[mood],
+                timestamp=timestamp,
+                context=strings[context],
+                tags=tags,
+                activities=activities,
+                playlist_id=strings[playlist_id]
+            )
+            for mood, timestamp, context, tags, activities, playlist_id in zip(
+                self.moods.values[rows].tolist(),
+                self._datetimes(rows),
+                self.contexts.values[rows].tolist(),
+                _ragged_rows(self.tags, strings, row_list),
+                _ragged_rows(self.activities, strings, row_list),
+                self.playlist_ids.values[rows].tolist()
+            )
+        ]
+
+    @property
+    def entries(self) -> List[MoodRow]:
+        """Row views of all entries in time order"""
+        return [MoodRow(self, int(i)) for i in self.order()]
+
+    def get_entry(self, entry_id: str) -> Optional[MoodRow]:
+        """Get a mood entry by its id"""
+        row = self.find(entry_id)
+        return None if row is None else MoodRow(self, row)
+
+    def get_entries_by_date(self,
+                            start_date: datetime,
+                            end_date: Optional[datetime] = None) -> List[MoodRow]:
+        """Get mood entries within a date range"""
+        if end_date is None:
+            end_date = datetime.now()
+        return [MoodRow(self, int(i)) for i in self.rows_between(start_date, end_date)]
+
+    def mood_counts(self, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """Count entries per mood within a date range, without building rows"""
+        moods = self.moods.values[self.rows_between(start_date, end_date)]
+        counts = np.bincount(moods, minlength=max(m.value for m in MoodLevel) + 1)
+        return {mood.name: int(counts[mood.value]) for mood in MoodLevel}
+
+def _decode_lyric(lyric: Dict) -> Dict:
+    if isinstance(lyric.get('timestamp'), str):
+        lyric['timestamp'] = datetime.fromisoformat(lyric['timestamp'])
+    return lyric
+
+class JournalRow:
+    """Read-only view of one row of a JournalStore, shaped like a JournalEntry"""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store: 'JournalStore', row: int):
+        self.store = store
+        self.row = row
+
+    @property
+    def mood_entry(self) -> MoodRow:
+        return MoodRow(self.store.mood_entries, self.row)
+
+    @property
+    def text(self) -> str:
+        return self.store.texts.row(self.row).tobytes().decode('utf-8')
+
+    @property
+    def timestamp(self) -> datetime:
+        return from_micros(self.store.timestamps[self.row])
+
+    @property
+    def liked_songs(self) -> List[Dict]:
+        songs = self.store.songs
+        return [songs[i] for i in self.store.liked_songs.row(self.row).tolist()]
+
+    @property
+    def memorable_lyrics(self) -> List[Dict]:
+        raw = self.store.lyrics.row(self.row).tobytes()
+        return [_decode_lyric(lyric) for lyric in json.loads(raw)] if raw else []
+
+    @property
+    def playlist_feedback(self) -> Optional[str]:
+        return self.store.strings.lookup(int(self.store.feedback[self.row]))
+
+    @property
+    def tags(self) -> List[str]:
+        return self.store.strings.lookup_all(self.store.tags.row(self.row))
+
+    @property
+    def entry_id(self) -> str:
+        return make_entry_id(self.timestamp)
+
+    def to_dict(self) -> Dict:
+        return self.to_entry().to_dict()
+
+    def to_entry(self) -> JournalEntry:
+        """Materialize the row as a JournalEntry"""
+        return JournalEntry(
+            mood_entry=self.mood_entry.to_entry(),
+            text=self.text,
+            timestamp=self.timestamp,
+            liked_songs=self.liked_songs,
+            memorable_lyrics=self.memorable_lyrics,
+            playlist_feedback=self.playlist_feedback,
+            tags=self.tags
+        )
+
+class JournalStore(ColumnarStore):
+    """
+    Columnar journal history. Texts are UTF-8 bytes in one flat array, liked
+    songs are interned by track id (each song dict is kept once) and the
+    linked mood entries live in a row-aligned MoodStore.
+    """
+    def __init__(self):
+        super().__init__()
+        self.mood_entries = MoodStore()
+        self.texts = RaggedColumn(np.uint8)
+        self.lyrics = RaggedColumn(np.uint8)
+        self.feedback = Column(np.int32)
+        self.tags = RaggedColumn(np.int32)
+        self.liked_songs = RaggedColumn(np.int32)
+        self.songs: List[Dict] = []
+        self._song_ids: Dict[str, int] = {}
+
+    def _intern_song(self, song: Dict) -> int:
+        song_id = self._song_ids.get(song['id'])
+        if song_id is None:
+            song_id = self._song_ids[song['id']] = len(self.songs)
+            self.songs.append(song)
+        return song_id
+
+    def add_entry(self, entry: JournalEntry) -> None:
+        """Add a new journal entry"""
+        self._append_timestamp(entry.timestamp)
+        self.mood_entries.add_entry(entry.mood_entry)
+        self.texts.append(np.frombuffer(entry.text.encode('utf-8'), dtype=np.uint8))
+        lyrics = (
+            json.dumps(entry.memorable_lyrics, default=datetime.isoformat).encode('utf-8')
+            if entry.memorable_lyrics else b''
+        )
+        self.lyrics.append(np.frombuffer(lyrics, dtype=np.uint8))
+        self.feedback.append(self.strings.intern_optional(entry.playlist_feedback))
+        self.tags.append([self.strings.intern(tag) for tag in entry.tags])
+        self.liked_songs.append([self._intern_song(song) for song in entry.liked_songs])
+
+    def row(self, i: int) -> JournalRow:
+        return JournalRow(self, i)
+
+    def to_entries(self) -> List[JournalEntry]:
+        """Materialize all rows in time order as JournalEntry objects, column by column"""
+        rows = self.order()
+        row_list = rows.tolist()
+        strings = self.strings.lookup_table()
+        text_bytes = self.texts.flat.values.tobytes()
+        text_offsets = self.texts.offsets.values.tolist()
+        lyric_bytes = self.lyrics.flat.values.tobytes()
+        lyric_offsets = self.lyrics.offsets.values.tolist()
+        entries = []
+        for row, mood_entry, timestamp, feedback, tags, liked_songs in zip(
+            row_list,
+            self.mood_entries.to_entries(rows),
+            self._datetimes(rows),
+            self.feedback.values[rows].tolist(),
+            _ragged_rows(self.tags, strings, row_list),
+            _ragged_rows(self.liked_songs, self.songs, row_list)
+        ):
+            lyrics = lyric_bytes[lyric_offsets[row]:lyric_offsets[row + 1]]
+            entries.append(JournalEntry(
+                mood_entry=mood_entry,
+                text=text_bytes[text_offsets[row]:text_offsets[row + 1]].decode('utf-8'),
+                timestamp=timestamp,
+                liked_songs=liked_songs,
+                memorable_lyrics=[_decode_lyric(lyric) for lyric in json.loads(lyrics)] if lyrics else [],
+                playlist_feedback=strings[feedback],
+                tags=tags
+            ))
+        return entries
+
+    @property
+    def entries(self) -> List[JournalRow]:
+        """Row views of all entries in time order"""
+        return [JournalRow(self, int(i)) for i in self.order()]
+
+    def get_entry(self, entry_id: str) -> Optional[JournalRow]:
+        """Get a journal entry by its id"""
+        row = self.find(entry_id)
+        return None if row is None else JournalRow(self, row)
+
+    def get_entries_by_date_range(self,
+                                  start_date: datetime,
+                                  end_date: Optional[datetime] = None) -> List[JournalRow]:
+        """Get all entries within a date range"""
+        if end_date is None:
+            end_date = datetime.now()
+        return [JournalRow(self, int(i)) for i in self.rows_between(start_date, end_date)]
+
+    def memory_usage(self) -> int:
+        return super().memory_usage() + self.mood_entries.memory_usage()
+
+    def save(self, directory: Path) -> None:
+        super().save(directory)
+        self.mood_entries.save(Path(directory) / 'mood_entries')
+
+    def _meta(self) -> Dict:
+        return {**super()._meta(), 'songs': self.songs}
+
+    def _load_extra(self, directory: Path, meta: Dict, mmap: bool) -> None:
+        self.mood_entries = MoodStore.load(directory / 'mood_entries', mmap)
+        self.songs = meta['songs']
+        self._song_ids = {song['id']: i for i, song in enumerate(self.songs)}
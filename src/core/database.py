@@ -26,4 +26,6 @@ class Database:
 class Collections:
     MOODS = "moods"
     JOURNALS = "journals"
-    PLAYLISTS = "playlists" 
\ No newline at end of file
+    PLAYLISTS = "playlists"
+    RECOMMENDATIONS = "recommendations"
+    PLAYLIST_JOBS = "playlist_jobs" 
\ No newline at end of file
@@ -0,0 +1,46 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+def make_entry_id(timestamp: datetime) -> str:
+    """Public id of a mood/journal entry (its POSIX timestamp as a string)"""
+    return str(timestamp.timestamp())
+
+class TimeIndex:
+    """
+    Entries kept sorted by timestamp, with a parallel timestamp list for
+    bisect-based range queries and a hash index from entry id to entry.
+    Entries must have a `timestamp` attribute.
+    """
+    def __init__(self):
+        self.entries: List[Any] = []
+        self._timestamps: List[datetime] = []
+        self._by_id: Dict[str, Any] = {}
+
+    def add(self, entry: Any) -> None:
+        timestamp = entry.timestamp
+        if not self._timestamps or timestamp >= self._timestamps[-1]:
+            # Entries normally arrive in time order
+            self.entries.append(entry)
+            self._timestamps.append(timestamp)
+        else:
+            i = bisect_right(self._timestamps, timestamp)
+            self.entries.insert(i, entry)
+            self._timestamps.insert(i, timestamp)
+        # The first entry recorded for an id wins, as with a linear scan
+        self._by_id.setdefault(make_entry_id(timestamp), entry)
+
+    def get(self, entry_id: str) -> Optional[Any]:
+        return self._by_id.get(entry_id)
+
+    def range(self, start: datetime, end: datetime, include_end: bool = True) -> List[Any]:
+        """Get entries with start <= timestamp <= end (or < end), in time order"""
+        lo = bisect_left(self._timestamps, start)
+        if include_end:
+            hi = bisect_right(self._timestamps, end)
+        else:
+            hi = bisect_left(self._timestamps, end)
+        return self.entries[lo:hi]
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,205 @@
+"""
+Declarative MongoDB index definitions for the application's collections.
+
+Indexes are ensured at API startup. The same definitions can be inspected
+and applied from the command line:
+
+    python -m src.core.indexes diff    # show missing, changed and extra indexes
+    python -m src.core.indexes apply   # create missing ones (add --rebuild to
+                                       # drop and recreate changed ones)
+    python -m src.core.indexes check   # explain() typical queries and report
+                                       # any collection scans or in-memory sorts
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from .database import Database, Collections
+
+# Index definitions per collection. Names are explicit so that a changed
+# definition shows up as a diff instead of a second index.
+INDEXES: Dict[str, List[IndexModel]] = {
+    Collections.MOODS: [
+        # Date range filters sorted newest first; _id breaks timestamp ties and
+        # completes the keyset pagination seek key
+        IndexModel([('timestamp', DESCENDING), ('_id', DESCENDING)], name='timestamp_id'),
+        IndexModel(
+            [('mood', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+            name='mood_timestamp_id'
+        ),
+        # Multikey: one index key per tag
+        IndexModel(
+            [('tags', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+            name='tags_timestamp_id'
+        ),
+        IndexModel(
+            [('entry_id', ASCENDING)], name='entry_id', unique=True,
+            partialFilterExpression={'entry_id': {'$type': 'string'}}
+        )
+    ],
+    Collections.JOURNALS: [
+        IndexModel(
+            [('entry_id', ASCENDING)], name='entry_id', unique=True,
+            partialFilterExpression={'entry_id': {'$type': 'string'}}
+        ),
+        # Monthly summaries and their (count, latest write) validator
+        IndexModel([('timestamp', ASCENDING), ('created_at', ASCENDING)], name='timestamp_created_at')
+    ],
+    Collections.PLAYLISTS: [
+        IndexModel([('mood_id', ASCENDING)], name='mood_id'),
+        IndexModel([('timestamp', DESCENDING)], name='timestamp')
+    ],
+    # Names match the ones create_index generated before these were declared
+    Collections.RECOMMENDATIONS: [
+        # TTL: expired cache documents are removed by the server
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_1', expireAfterSeconds=0),
+        # Least recently accessed documents are evicted first
+        IndexModel([('last_access', ASCENDING)], name='last_access_1')
+    ],
+    Collections.PLAYLIST_JOBS: [
+        IndexModel(
+            [('idempotency_key', ASCENDING)], name='idempotency_key_1', unique=True,
+            partialFilterExpression={'idempotency_key': {'$type': 'string'}}
+        ),
+        # Claiming the next due job
+        IndexModel([('status', ASCENDING), ('run_at', ASCENDING)], name='status_1_run_at_1')
+    ]
+}
+
+# Options that distinguish two indexes on the same keys
+_COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds')
+
+def _direction(direction):
+    # The server may report 1 as 1.0; 'text', 'hashed', '2dsphere'... are kept as-is
+    if isinstance(direction, (int, float)) and not isinstance(direction, bool):
+        return int(direction)
+    return direction
+
+def _normalize(spec: Dict) -> Dict:
+    key = spec['key']
+    items = key.items() if hasattr(key, 'items') else key
+    normalized = {'key': [(field, _direction(direction)) for field, direction in items]}
+    for option in _COMPARED_OPTIONS:
+        if spec.get(option) not in (None, False):
+            normalized[option] = spec[option]
+    return normalized
+
+async def diff_indexes(db, collections: Optional[List[str]] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare declared indexes with the database.
+    Returns {collection: {'missing': [...], 'changed': [...], 'extra': [...]}}
+    """
+    plan = {}
+    for name in collections or INDEXES:
+        existing = {
+            index_name: _normalize(info)
+            for index_name, info in (await db[name].index_information()).items()
+            if index_name != '_id_'
+        }
+        declared = {model.document['name']: _normalize(model.document) for model in INDEXES[name]}
+        plan[name] = {
+            'missing': [n for n in declared if n not in existing],
+            'changed': [n for n in declared if n in existing and existing[n] != declared[n]],
+            'extra': [n for n in existing if n not in declared]
+        }
+    return plan
+
+async def ensure_indexes(db, rebuild: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create missing indexes; safe to run repeatedly. Changed indexes are only
+    dropped and recreated with `rebuild`, since that can be slow on large
+    collections. Extra indexes are left alone. Returns the diff acted on.
+    """
+    plan = await diff_indexes(db)
+    for name, changes in plan.items():
+        models = {model.document['name']: model for model in INDEXES[name]}
+        to_create = list(changes['missing'])
+        if rebuild:
+            for index_name in changes['changed']:
+                await db[name].drop_index(index_name)
+            to_create += changes['changed']
+        if to_create:
+            await db[name].create_indexes([models[n] for n in to_create])
+    return plan
+
+def _plan_stages(plan: Dict) -> List[str]:
+    """Stage names of a query plan tree"""
+    plan = plan.get('queryPlan', plan)
+    stages = [plan.get('stage')]
+    children = plan.get('inputStages', []) + ([plan['inputStage']] if 'inputStage' in plan else [])
+    for child in children:
+        stages += _plan_stages(child)
+    return stages
+
+def _typical_queries(since: datetime) -> List[tuple]:
+    """(collection, filter, sort) for the queries the API runs"""
+    newest_first = [('timestamp', DESCENDING), ('_id', DESCENDING)]
+    # GET /moods past the first page: the filter joined with the cursor's seek key
+    next_page = {'$and': [
+        {'timestamp': {'$type': 'date'}},
+        {'timestamp': {'$lte': since}, '$or': [
+            {'timestamp': {'$lt': since}},
+            {'timestamp': since, '_id': {'$lt': ObjectId('f' * 24)}}
+        ]}
+    ]}
+    return [
+        (Collections.MOODS, {'timestamp': {'$gte': since}}, newest_first),
+        (Collections.MOODS, next_page, newest_first),
+        (Collections.MOODS, {'mood': 'HAPPY'}, newest_first),
+        (Collections.MOODS, {'tags': {'$in': ['work']}}, newest_first),
+        (Collections.MOODS, {'entry_id': '0.0'}, None),
+        (Collections.JOURNALS, {'entry_id': '0.0'}, None),
+        (Collections.JOURNALS, {'timestamp': {'$gte': since, '$lt': datetime.now()}}, None),
+        (Collections.PLAYLISTS, {'mood_id': '0' * 24}, None)
+    ]
+
+async def check_query_plans(db) -> List[str]:
+    """Explain the API's typical queries; return a problem per collection scan or in-memory sort"""
+    problems = []
+    for name, query, sort in _typical_queries(datetime.now() - timedelta(days=30)):
+        cursor = db[name].find(query).limit(10)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _plan_stages(explain['queryPlanner']['winningPlan'])
+        if 'COLLSCAN' in stages:
+            problems.append(f"{name} {query}: collection scan")
+        if 'SORT' in stages:
+            problems.append(f"{name} {query}: in-memory sort")
+    return problems
+
+async def _main(args: argparse.Namespace) -> int:
+    await Database.connect_db()
+    db = await Database.get_db()
+    try:
+        if args.command == 'check':
+            problems = await check_query_plans(db)
+            for problem in problems:
+                print(problem)
+            print("ok" if not problems else f"{len(problems)} problem(s)")
+            return 1 if problems else 0
+
+        if args.command == 'apply':
+            plan = await ensure_indexes(db, rebuild=args.rebuild)
+        else:
+            plan = await diff_indexes(db)
+        for name, changes in plan.items():
+            for change, index_names in changes.items():
+                for index_name in index_names:
+                    print(f"{name}.{index_name}: {change}")
+        return 0
+    finally:
+        await Database.close_db()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes")
+    parser.add_argument('command', choices=['diff', 'apply', 'check'])
+    parser.add_argument('--rebuild', action='store_true',
+                        help="drop and recreate indexes whose definition changed")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
-from datetime import datetime
-from typing import Optional, List, Dict
+import heapq
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Any, Optional, List, Dict, Tuple
 from dataclasses import dataclass, field
+from time import perf_counter
 from .mood_tracker import MoodEntry
+from .entry import TimeIndex, make_entry_id
 
 @dataclass
 class JournalEntry:
@@ -21,6 +25,10 @@ class JournalEntry:
     # Tags for better organization and searching
     tags: List[str] = field(default_factory=list)
     
+    @property
+    def entry_id(self) -> str:
+        return make_entry_id(self.timestamp)
+    
     def add_liked_song(self, track: Dict) -> None:
         """Add a song that resonated during this journaling session"""
         if track not in self.liked_songs:
@@ -45,18 +53,155 @@ class JournalEntry:
             "playlist_feedback": self.playlist_feedback,
             "tags": self.tags
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'JournalEntry':
+        """Create JournalEntry from dictionary"""
+        lyrics = []
+        for lyric in data.get("memorable_lyrics", []):
+            if isinstance(lyric.get("timestamp"), str):
+                lyric = {**lyric, "timestamp": datetime.fromisoformat(lyric["timestamp"])}
+            lyrics.append(lyric)
+        return cls(
+            mood_entry=MoodEntry.from_dict(data["mood_data"]),
+            text=data["text"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            liked_songs=data.get("liked_songs", []),
+            memorable_lyrics=lyrics,
+            playlist_feedback=data.get("playlist_feedback"),
+            tags=data.get("tags", [])
+        )
+
+def _month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Get the start of the month and the start of the next one"""
+    start_date = datetime(year, month, 1)
+    if month == 12:
+        end_date = datetime(year + 1, 1, 1)
+    else:
+        end_date = datetime(year, month + 1, 1)
+    return start_date, end_date
+
+class _Tally:
+    """Running counts per key with heap-based top-K selection"""
+    def __init__(self):
+        # Keys in first-seen order, so ties keep that order
+        self.counts: Dict[Any, int] = {}
+        self.items: Dict[Any, Any] = {}
+    
+    def add(self, key: Any, item: Any = None) -> None:
+        if key not in self.counts:
+            self.counts[key] = 0
+            self.items[key] = item
+        self.counts[key] += 1
+    
+    def top(self, limit: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """Get (key, count) pairs, most frequent first; all of them if limit is None"""
+        if limit is None:
+            return sorted(self.counts.items(), key=itemgetter(1), reverse=True)
+        return heapq.nlargest(limit, self.counts.items(), key=itemgetter(1))
+
+class _MusicCounters:
+    """Liked song and theme counts for a set of journal entries"""
+    def __init__(self):
+        self.songs = _Tally()
+        self.themes = _Tally()
+    
+    def add(self, entry: JournalEntry) -> None:
+        for song in entry.liked_songs:
+            self.songs.add(song['id'], song)
+        for tag in entry.tags:
+            self.themes.add(tag)
 
 class JournalManager:
     """
     Manages journal entries and provides analysis capabilities.
     This handles the journal/music review functionality shown in your prototype.
     """
-    def __init__(self):
-        self.entries: List[JournalEntry] = []
+    def __init__(self, top_songs: int = 10, top_themes: Optional[int] = None):
+        self._index = TimeIndex()
+        # How many songs/themes reviews report (None for all themes)
+        self.top_songs = top_songs
+        self.top_themes = top_themes
+        # Running song and theme counts, per (year, month) and overall
+        self._month_counters: Dict[Tuple[int, int], _MusicCounters] = {}
+        self._counters = _MusicCounters()
+        # Monthly summaries keyed by (year, month); a month's summary is only
+        # dropped when add_entry touches that month
+        self._summaries: Dict[Tuple[int, int], Dict] = {}
+        # (version, last modified) per month, for HTTP validators
+        self._month_versions: Dict[Tuple[int, int], Tuple[int, datetime]] = {}
+        # Persistence (see attach_log); restored rows are indexed by hydrate()
+        self.log = None
+        self._pending = None
+    
+    def attach_log(self, log) -> None:
+        """
+        Persist entries through an EntryLog and restore the history it holds.
+        Only the log tail is read now; the restored entries are indexed by
+        hydrate(), or the first time the manager is used.
+        """
+        self._pending = log.open()
+        self.log = log
+    
+    def hydrate(self) -> None:
+        """
+        Index the restored entries, then drop their columnar copy. This is
+        O(history) (entries are rebuilt column by column, not per row view);
+        run it on a worker thread before the manager is shared.
+        """
+        store, self._pending = self._pending, None
+        if store is None:
+            return
+        started = perf_counter()
+        for entry in store.to_entries():
+            self._add_entry(entry)
+        if self.log is not None:
+            self.log.record_hydration(len(store), perf_counter() - started)
+    
+    @property
+    def entries(self) -> List[JournalEntry]:
+        """All entries in time order (add new ones with add_entry)"""
+        self.hydrate()
+        return self._index.entries
         
     def add_entry(self, entry: JournalEntry) -> None:
-        """Add a new journal entry"""
-        self.entries.append(entry)
+        """
+        Add a new journal entry.
+        Entries must be complete when added; later changes to an entry are
+        not reflected in its month's cached summary.
+        """
+        self.hydrate()
+        if self.log is not None:
+            self.log.append(entry)
+        self._add_entry(entry)
+    
+    def _add_entry(self, entry: JournalEntry) -> None:
+        self._index.add(entry)
+        
+        month = (entry.timestamp.year, entry.timestamp.month)
+        if month not in self._month_counters:
+            self._month_counters[month] = _MusicCounters()
+        self._month_counters[month].add(entry)
+        self._counters.add(entry)
+        
+        self._summaries.pop(month, None)
+        version, _ = self._month_versions.get(month, (0, None))
+        self._month_versions[month] = (version + 1, datetime.now(timezone.utc))
+    
+    def month_version(self, year: int, month: int) -> Tuple[int, Optional[datetime]]:
+        """Get how often a month was modified and when (UTC) it last was"""
+        self.hydrate()
+        return self._month_versions.get((year, month), (0, None))
+    
+    @staticmethod
+    def is_sealed(year: int, month: int) -> bool:
+        """Whether the month is over, so only backdated entries can change it"""
+        return _month_bounds(year, month)[1] <= datetime.now()
+    
+    def get_entry(self, entry_id: str) -> Optional[JournalEntry]:
+        """Get a journal entry by its id"""
+        self.hydrate()
+        return self._index.get(entry_id)
     
     def get_entries_by_date_range(self, 
                                 start_date: datetime, 
@@ -65,30 +210,33 @@ class JournalManager:
         if end_date is None:
             end_date = datetime.now()
             
-        return [
-            entry for entry in self.entries 
-            if start_date <= entry.timestamp <= end_date
-        ]
+        self.hydrate()
+        return self._index.range(start_date, end_date)
     
     def get_monthly_summary(self, year: int, month: int) -> Dict:
         """
         Generate monthly summary of journal entries and music.
         This corresponds to the 'your music review' section in your prototype.
+        The result is memoized until an entry for the month is added and is
+        shared between callers, so it must not be modified.
         """
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-            
-        entries = self.get_entries_by_date_range(start_date, end_date)
+        self.hydrate()
+        summary = self._summaries.get((year, month))
+        if summary is None:
+            summary = self._summaries[(year, month)] = self._build_monthly_summary(year, month)
+        return summary
+    
+    def _build_monthly_summary(self, year: int, month: int) -> Dict:
+        start_date, end_date = _month_bounds(year, month)
+        entries = self._index.range(start_date, end_date, include_end=False)
+        counters = self._month_counters.get((year, month)) or _MusicCounters()
         
         return {
             "total_entries": len(entries),
             "mood_distribution": self._calculate_mood_distribution(entries),
-            "favorite_songs": self._get_top_songs(entries),
+            "favorite_songs": self._get_top_songs(counters, self.top_songs),
             "memorable_lyrics": self._collect_memorable_lyrics(entries),
-            "common_themes": self._extract_common_themes(entries)
+            "common_themes": self._extract_common_themes(counters, self.top_themes)
         }
     
     def _calculate_mood_distribution(self, entries: List[JournalEntry]) -> Dict:
@@ -99,23 +247,14 @@ class JournalManager:
             distribution[mood] = distribution.get(mood, 0) + 1
         return distribution
     
-    def _get_top_songs(self, entries: List[JournalEntry], limit: int = 10) -> List[Dict]:
-        """Get most liked songs across entries"""
-        song_counts = {}
-        for entry in entries:
-            for song in entry.liked_songs:
-                song_id = song['id']
-                if song_id not in song_counts:
-                    song_counts[song_id] = {'count': 0, 'song': song}
-                song_counts[song_id]['count'] += 1
-        
-        # Sort by count and return top songs
-        sorted_songs = sorted(
-            song_counts.values(), 
-            key=lambda x: x['count'], 
-            reverse=True
-        )
-        return [item['song'] for item in sorted_songs[:limit]]
+    def _get_top_songs(self, counters: _MusicCounters, limit: int = 10) -> List[Dict]:
+        """Get most liked songs from running counts"""
+        return [counters.songs.items[song_id] for song_id, _ in counters.songs.top(limit)]
+    
+    def get_top_songs(self, limit: Optional[int] = None) -> List[Dict]:
+        """Get the most liked songs across all entries"""
+        self.hydrate()
+        return self._get_top_songs(self._counters, limit or self.top_songs)
     
     def _collect_memorable_lyrics(self, entries: List[JournalEntry]) -> List[Dict]:
         """Collect all memorable lyrics from entries"""
@@ -124,17 +263,11 @@ class JournalManager:
             all_lyrics.extend(entry.memorable_lyrics)
         return all_lyrics
     
-    def _extract_common_themes(self, entries: List[JournalEntry]) -> Dict[str, int]:
+    def _extract_common_themes(self,
+                               counters: _MusicCounters,
+                               limit: Optional[int] = None) -> Dict[str, int]:
         """
         Extract common themes/tags from journal entries
         This helps identify patterns in the user's emotional journey
         """
-        theme_counts = {}
-        for entry in entries:
-            for tag in entry.tags:
-                theme_counts[tag] = theme_counts.get(tag, 0) + 1
-        return dict(sorted(
-            theme_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )) 
\ No newline at end of file
+        return dict(counters.themes.top(limit)) 
\ No newline at end of file
@@ -1,7 +1,10 @@
 from enum import Enum
-from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, date, time, timedelta
 from typing import Optional, List, Dict
 from dataclasses import dataclass, field
+from time import perf_counter
+from .entry import TimeIndex, make_entry_id
 
 class MoodLevel(Enum):
     HAPPY = 5
@@ -20,6 +23,10 @@ class MoodEntry:
     journal_entry: Optional['JournalEntry'] = None
     playlist_id: Optional[str] = None
     
+    @property
+    def entry_id(self) -> str:
+        return make_entry_id(self.timestamp)
+    
     def to_dict(self) -> Dict:
         """Convert mood entry to dictionary for storage"""
         return {
@@ -44,13 +51,132 @@ class MoodEntry:
             playlist_id=data.get('playlist_id')
         )
 
-class MoodTracker:
+# Fixed order of mood counters in day buckets and prefix sums
+MOOD_ORDER = list(MoodLevel)
+MOOD_POSITION = {mood: i for i, mood in enumerate(MOOD_ORDER)}
+
+class _DayBucket:
+    """
+    Running mood counters for one calendar day. Context and activity keys
+    are kept in the order they first appear in time, like a scan would
+    produce; an entry backdated within the day marks that order stale.
+    """
+    __slots__ = ('moods', 'contexts', 'activities', 'latest', 'stale')
+    
     def __init__(self):
-        self.entries: List[MoodEntry] = []
+        self.moods = [0] * len(MOOD_ORDER)
+        self.contexts: Dict[str, int] = {}
+        self.activities: Dict[str, int] = {}
+        self.latest: Optional[datetime] = None
+        self.stale = False
+    
+    def add(self, entry: MoodEntry) -> None:
+        self.moods[MOOD_POSITION[entry.mood]] += 1
+        if self.latest is not None and entry.timestamp < self.latest:
+            self.stale = True
+        else:
+            self.latest = entry.timestamp
+        _count_labels(self.contexts, self.activities, entry)
+    
+    def reorder(self, entries: List[MoodEntry]) -> None:
+        """Rebuild the label counts from the day's entries in time order"""
+        self.contexts = {}
+        self.activities = {}
+        for entry in entries:
+            _count_labels(self.contexts, self.activities, entry)
+        self.stale = False
+
+def _count_labels(contexts: Dict[str, int], activities: Dict[str, int], entry: MoodEntry) -> None:
+    if entry.context:
+        contexts[entry.context] = contexts.get(entry.context, 0) + 1
+    for activity in entry.activities:
+        activities[activity] = activities.get(activity, 0) + 1
+
+class MoodTracker:
+    def __init__(self, verify_trends: bool = False):
+        self._index = TimeIndex()
+        # Per-day counters plus prefix sums of the mood counts over the
+        # sorted days, so trends never have to rescan whole days
+        self._days: List[date] = []
+        self._buckets: Dict[date, _DayBucket] = {}
+        self._prefix: List[List[int]] = [[0] * len(MOOD_ORDER)]
+        self._prefix_dirty = False
+        # Cross-check every trend query against a full scan
+        self.verify_trends = verify_trends
+        # Persistence (see attach_log); restored rows are indexed by hydrate()
+        self.log = None
+        self._pending = None
+    
+    def attach_log(self, log) -> None:
+        """
+        Persist entries through an EntryLog and restore the history it holds.
+        Only the log tail is read now; the restored entries are indexed by
+        hydrate(), or the first time the tracker is used.
+        """
+        self._pending = log.open()
+        self.log = log
+    
+    def hydrate(self) -> None:
+        """
+        Index the restored entries, then drop their columnar copy. This is
+        O(history) (entries are rebuilt column by column, not per row view);
+        run it on a worker thread before the tracker is shared.
+        """
+        store, self._pending = self._pending, None
+        if store is None:
+            return
+        started = perf_counter()
+        for entry in store.to_entries():
+            self._add_entry(entry)
+        if self.log is not None:
+            self.log.record_hydration(len(store), perf_counter() - started)
+    
+    @property
+    def entries(self) -> List[MoodEntry]:
+        """All entries in time order (add new ones with add_entry)"""
+        self.hydrate()
+        return self._index.entries
         
     def add_entry(self, entry: MoodEntry) -> None:
         """Add a new mood entry"""
-        self.entries.append(entry)
+        self.hydrate()
+        if self.log is not None:
+            self.log.append(entry)
+        self._add_entry(entry)
+    
+    def _add_entry(self, entry: MoodEntry) -> None:
+        self._index.add(entry)
+        
+        day = entry.timestamp.date()
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            bucket = self._buckets[day] = _DayBucket()
+            if self._days and day < self._days[-1]:
+                insort(self._days, day)
+                self._prefix_dirty = True
+            else:
+                self._days.append(day)
+                self._prefix.append(list(self._prefix[-1]))
+        elif day != self._days[-1]:
+            self._prefix_dirty = True
+        bucket.add(entry)
+        
+        # Entries for the latest day only touch the last prefix sum
+        if not self._prefix_dirty:
+            self._prefix[-1][MOOD_POSITION[entry.mood]] += 1
+    
+    def _rebuild_prefix(self) -> None:
+        prefix = [[0] * len(MOOD_ORDER)]
+        for day in self._days:
+            moods = self._buckets[day].moods
+            prefix.append([total + count for total, count in zip(prefix[-1], moods)])
+        self._prefix = prefix
+        self._prefix_dirty = False
+    
+    def get_entry(self, entry_id: str) -> Optional[MoodEntry]:
+        """Get a mood entry by its id"""
+        self.hydrate()
+        return self._index.get(entry_id)
         
     def get_entries_by_date(self, 
                            start_date: datetime, 
@@ -59,17 +185,93 @@ class MoodTracker:
         if end_date is None:
             end_date = datetime.now()
             
-        return [
-            entry for entry in self.entries 
-            if start_date <= entry.timestamp <= end_date
-        ]
+        self.hydrate()
+        return self._index.range(start_date, end_date)
     
     def get_mood_trends(self, 
                        start_date: datetime, 
-                       end_date: Optional[datetime] = None) -> Dict:
-        """Calculate mood trends over time"""
-        entries = self.get_entries_by_date(start_date, end_date)
+                       end_date: Optional[datetime] = None,
+                       verify: bool = False) -> Dict:
+        """
+        Calculate mood trends over time.
+        Days fully inside the range are answered from the per-day counters;
+        only the partial days at either end are scanned.
+        """
+        if end_date is None:
+            end_date = datetime.now()
+        
+        self.hydrate()
+        trends = self._aggregate_trends(start_date, end_date)
+        
+        if verify or self.verify_trends:
+            expected = self._scan_mood_trends(self.get_entries_by_date(start_date, end_date))
+            # Key order is part of the output (it shows in the JSON response)
+            if trends != expected or any(
+                list(trends[key]) != list(expected[key])
+                for key in ('common_contexts', 'common_activities')
+            ):
+                raise RuntimeError(
+                    f"Incremental mood trends diverged from a full scan: {trends} != {expected}"
+                )
+        return trends
+    
+    def _aggregate_trends(self, start_date: datetime, end_date: datetime) -> Dict:
+        def midnight(day: date) -> datetime:
+            return datetime.combine(day, time.min, tzinfo=start_date.tzinfo)
+        
+        # Day d is fully covered when start <= midnight(d) and midnight(d + 1) <= end
+        first_full = start_date.date()
+        if start_date != midnight(first_full):
+            first_full += timedelta(days=1)
+        last_full = end_date.date() - timedelta(days=1)
         
+        if first_full > last_full:
+            return self._scan_mood_trends(self._index.range(start_date, end_date))
+        
+        if self._prefix_dirty:
+            self._rebuild_prefix()
+        lo = bisect_left(self._days, first_full)
+        hi = bisect_right(self._days, last_full)
+        mood_counts = [b - a for a, b in zip(self._prefix[lo], self._prefix[hi])]
+        
+        # Merge in time order (leading partial day, whole days, trailing
+        # partial day) so keys come out in the same order as a full scan
+        contexts: Dict[str, int] = {}
+        activities: Dict[str, int] = {}
+        leading = self._index.range(start_date, midnight(first_full), include_end=False)
+        trailing = self._index.range(midnight(last_full + timedelta(days=1)), end_date)
+        for entry in leading:
+            _count_labels(contexts, activities, entry)
+        for day in self._days[lo:hi]:
+            bucket = self._buckets[day]
+            if bucket.stale:
+                bucket.reorder(self._index.range(
+                    midnight(day), midnight(day + timedelta(days=1)), include_end=False
+                ))
+            for context, count in bucket.contexts.items():
+                contexts[context] = contexts.get(context, 0) + count
+            for activity, count in bucket.activities.items():
+                activities[activity] = activities.get(activity, 0) + count
+        for entry in trailing:
+            _count_labels(contexts, activities, entry)
+        
+        for entry in leading + trailing:
+            mood_counts[MOOD_POSITION[entry.mood]] += 1
+        
+        total = sum(mood_counts)
+        mood_sum = sum(mood.value * count for mood, count in zip(MOOD_ORDER, mood_counts))
+        return {
+            'average_mood': mood_sum / total if total else 0,
+            'mood_distribution': {
+                mood.name: count for mood, count in zip(MOOD_ORDER, mood_counts)
+            },
+            'common_contexts': contexts,
+            'common_activities': activities
+        }
+    
+    @staticmethod
+    def _scan_mood_trends(entries: List[MoodEntry]) -> Dict:
+        """Reference implementation: aggregate trends from raw entries"""
         trends = {
             'average_mood': sum(e.mood.value for e in entries) / len(entries) if entries else 0,
             'mood_distribution': {mood.name: 0 for mood in MoodLevel},
@@ -88,4 +290,4 @@ class MoodTracker:
                 trends['common_activities'][activity] = \
                     trends['common_activities'].get(activity, 0) + 1
         
-        return trends 
\ No newline at end of file
+        return trends 
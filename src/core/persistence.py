@@ -0,0 +1,351 @@
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+from .columnar import ColumnarStore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# When appended log records are forced to disk:
+#   always   - fsync after every entry (no loss on power failure)
+#   interval - fsync at most every PERSISTENCE_FSYNC_INTERVAL seconds
+#   never    - leave it to the OS (survives process crashes only)
+FSYNC_POLICIES = ('always', 'interval', 'never')
+PERSISTENCE_FSYNC = os.getenv('PERSISTENCE_FSYNC', 'interval')
+PERSISTENCE_FSYNC_INTERVAL = float(os.getenv('PERSISTENCE_FSYNC_INTERVAL', '1'))
+# Entries logged before the log is folded into a new snapshot
+PERSISTENCE_COMPACT_EVERY = int(os.getenv('PERSISTENCE_COMPACT_EVERY', '10000'))
+
+class DirectoryLocked(RuntimeError):
+    """Raised when another process already has the persistence directory open"""
+    def __init__(self, directory: Path):
+        self.directory = directory
+        super().__init__(
+            f"{directory} is in use by another process; entry logs support a "
+            "single writer (run one worker, or use HISTORY_BACKEND=mongo)"
+        )
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on some platforms (e.g. Windows)
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_file(path: Path) -> None:
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+def _generation(path: Path) -> int:
+    # snapshot.<gen> / wal.<gen>.jsonl
+    return int(path.name.split('.')[1])
+
+class EntryLog:
+    """
+    Snapshot + write-ahead log persistence for a columnar entry store.
+
+    Every entry is appended to a JSON-lines log; every `compact_every`
+    entries the log is sealed, a fresh one is started and a background
+    thread folds the sealed log into a new columnar snapshot. On open the
+    snapshot is memory-mapped and only the logs written since are replayed,
+    so startup time follows the log tail rather than the whole history.
+    The store returned by open() is not kept: compaction rebuilds snapshots
+    from disk, so the caller can drop it once it has been indexed.
+
+    A directory must only be used by one process at a time (a single API
+    worker); open() takes a lock file and fails fast with DirectoryLocked
+    if another process holds it.
+
+    Layout of `directory`:
+        LOCK                  held while the log is open
+        CURRENT               generation of the live snapshot
+        snapshot.<gen>/       ColumnarStore.save() output
+        wal.<gen>.jsonl       entries added since that snapshot; a sealed
+                              log not yet compacted is followed by
+                              wal.<gen + 1>.jsonl and so on
+    """
+    def __init__(self,
+                 directory: Path,
+                 store_type: Type[ColumnarStore],
+                 entry_from_dict: Callable[[Dict], Any],
+                 fsync: str = PERSISTENCE_FSYNC,
+                 fsync_interval: float = PERSISTENCE_FSYNC_INTERVAL,
+                 compact_every: int = PERSISTENCE_COMPACT_EVERY):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.directory = Path(directory)
+        self.store_type = store_type
+        self.entry_from_dict = entry_from_dict
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        # Generation of the snapshot in CURRENT, and of the log being appended to
+        self.snapshot_generation = 0
+        self.generation = 0
+        self.rows = 0
+        self._wal = None
+        self._lock_file = None
+        # Guards swapping self._wal against a concurrent sync()
+        self._wal_lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._last_fsync = 0.0
+        # Value of `appends` covered by the last completed fsync
+        self._synced_appends = 0
+        self._since_snapshot = 0
+        self.appends = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self.last_compaction_seconds = 0.0
+        self.startup: Dict = {}
+
+    def _snapshot_path(self, generation: int) -> Path:
+        return self.directory / f'snapshot.{generation}'
+
+    def _wal_path(self, generation: int) -> Path:
+        return self.directory / f'wal.{generation}.jsonl'
+
+    def _lock(self) -> None:
+        self._lock_file = open(self.directory / 'LOCK', 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise DirectoryLocked(self.directory) from None
+
+    def open(self) -> ColumnarStore:
+        """Load the snapshot, replay the log tail and start accepting appends"""
+        started = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock()
+        current = self.directory / 'CURRENT'
+        self.snapshot_generation = int(current.read_text()) if current.exists() else 0
+
+        store = self._load_snapshot(self.snapshot_generation)
+        snapshot_rows = len(store)
+        loaded = time.perf_counter()
+
+        # Replay every log since the snapshot; only the last one can be torn
+        self.generation = self.snapshot_generation
+        replayed = self._replay(store, self._wal_path(self.generation), truncate=True)
+        while self._wal_path(self.generation + 1).exists():
+            self.generation += 1
+            replayed += self._replay(store, self._wal_path(self.generation), truncate=True)
+        self._since_snapshot = replayed
+        self.rows = len(store)
+        self._wal = open(self._wal_path(self.generation), 'a', encoding='utf-8')
+        self._remove_stale(self.snapshot_generation)
+
+        finished = time.perf_counter()
+        self.startup = {
+            'snapshot_rows': snapshot_rows,
+            'log_rows_replayed': replayed,
+            'snapshot_load_seconds': loaded - started,
+            'log_replay_seconds': finished - loaded,
+            'total_seconds': finished - started
+        }
+        return store
+
+    def record_hydration(self, rows: int, seconds: float) -> None:
+        """
+        Record how long the owner took to index the restored store, so the
+        startup metrics cover the whole time until history can be served
+        """
+        self.startup['hydrated_rows'] = rows
+        self.startup['hydrate_seconds'] = seconds
+        self.startup['ready_seconds'] = self.startup.get('total_seconds', 0) + seconds
+
+    def _load_snapshot(self, generation: int) -> ColumnarStore:
+        snapshot = self._snapshot_path(generation)
+        if snapshot.exists():
+            return self.store_type.load(snapshot)
+        return self.store_type()
+
+    def _replay(self, store: ColumnarStore, wal_path: Path, truncate: bool = False) -> int:
+        if not wal_path.exists():
+            return 0
+        replayed = 0
+        valid_bytes = 0
+        with open(wal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = self.entry_from_dict(json.loads(line))
+                except ValueError:
+                    break
+                store.add_entry(entry)
+                valid_bytes += len(line)
+                replayed += 1
+        # Drop a record torn by a crash mid-write so new appends stay parseable
+        if truncate and valid_bytes < wal_path.stat().st_size:
+            with open(wal_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        return replayed
+
+    def _remove_stale(self, snapshot_generation: int) -> None:
+        """
+        Remove other snapshots and the logs already folded into this one
+        (e.g. left by an interrupted compaction)
+        """
+        for path in self.directory.iterdir():
+            if path.name.startswith('snapshot.') and _generation(path) != snapshot_generation:
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.name.startswith('wal.') and _generation(path) < snapshot_generation:
+                path.unlink()
+
+    def append(self, entry: Any) -> None:
+        """
+        Log an entry. The record is handed to the OS right away; call sync()
+        when sync_due() says the fsync policy wants it on disk.
+        """
+        record = json.dumps(entry.to_dict(), default=datetime.isoformat)
+        self._wal.write(record + '\n')
+        self._wal.flush()
+        self.rows += 1
+        self.appends += 1
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.compact_every and not self.compacting:
+            self.compact(background=True)
+
+    def sync_due(self) -> bool:
+        """
+        Whether the fsync policy wants the log forced to disk now. With the
+        interval policy the owner must also ask periodically (not only after
+        appends), or the last entries could stay unsynced indefinitely.
+        """
+        if self.appends == self._synced_appends:
+            return False
+        if self.fsync == 'always':
+            return True
+        return (
+            self.fsync == 'interval'
+            and time.monotonic() - self._last_fsync >= self.fsync_interval
+        )
+
+    def sync(self) -> None:
+        """Force the log to disk (blocking; safe to run on a worker thread)"""
+        self._last_fsync = time.monotonic()
+        with self._wal_lock:
+            if self._wal is None:
+                return
+            appends = self.appends
+            # A duplicate descriptor stays valid if the log is sealed meanwhile
+            fd = os.dup(self._wal.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._synced_appends = max(self._synced_appends, appends)
+        self.fsyncs += 1
+
+    @property
+    def compacting(self) -> bool:
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def compact(self, background: bool = False) -> None:
+        """
+        Seal the log, start an empty one and fold the sealed logs into a new
+        snapshot. Only sealing happens in the caller; with `background` the
+        snapshot is written on a separate thread.
+        """
+        if self.compacting:
+            self._compaction.join()
+        sealed = self.generation
+        wal = open(self._wal_path(sealed + 1), 'a', encoding='utf-8')
+        with self._wal_lock:
+            previous, self._wal = self._wal, wal
+        previous.close()
+        self.generation = sealed + 1
+        self._since_snapshot = 0
+        if background:
+            self._compaction = threading.Thread(
+                target=self._write_snapshot, args=(sealed,),
+                name=f'compact-{self.directory.name}', daemon=True
+            )
+            self._compaction.start()
+        else:
+            self._write_snapshot(sealed)
+
+    def _write_snapshot(self, sealed: int) -> None:
+        """Build snapshot.<sealed + 1> from the current snapshot and logs up to `sealed`"""
+        started = time.perf_counter()
+        store = self._load_snapshot(self.snapshot_generation)
+        for generation in range(self.snapshot_generation, sealed + 1):
+            path = self._wal_path(generation)
+            if self.fsync != 'never' and path.exists():
+                _fsync_file(path)
+            self._replay(store, path)
+
+        generation = sealed + 1
+        snapshot = self._snapshot_path(generation)
+        if snapshot.exists():
+            shutil.rmtree(snapshot)
+        store.save(snapshot)
+        for path in snapshot.rglob('*'):
+            if path.is_file():
+                _fsync_file(path)
+
+        # Switching CURRENT is the commit point; until then a crash leaves
+        # the previous snapshot and its complete logs in place
+        current = self.directory / 'CURRENT'
+        tmp = self.directory / 'CURRENT.tmp'
+        tmp.write_text(str(generation))
+        _fsync_file(tmp)
+        os.replace(tmp, current)
+        _fsync_dir(self.directory)
+
+        self.snapshot_generation = generation
+        self._remove_stale(generation)
+        self.compactions += 1
+        self.last_compaction_seconds = time.perf_counter() - started
+
+    def close(self, compact: bool = True) -> None:
+        """
+        Flush the log, optionally folding it into a snapshot for a fast next
+        start, and release the directory. Blocks until compaction finishes.
+        """
+        if self._wal is None:
+            return
+        if self.compacting:
+            self._compaction.join()
+        if compact and self._since_snapshot:
+            self.compact()
+        self._wal.flush()
+        if self.fsync != 'never':
+            self.sync()
+        with self._wal_lock:
+            self._wal.close()
+            self._wal = None
+        self._lock_file.close()
+        self._lock_file = None
+
+    def stats(self) -> Dict:
+        return {
+            'rows': self.rows,
+            'generation': self.snapshot_generation,
+            'log_generation': self.generation,
+            'log_rows': self._since_snapshot,
+            'fsync_policy': self.fsync,
+            'appends': self.appends,
+            'fsyncs': self.fsyncs,
+            'compactions': self.compactions,
+            'compacting': self.compacting,
+            'last_compaction_seconds': self.last_compaction_seconds,
+            'startup': self.startup
+        }
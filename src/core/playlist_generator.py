@@ -1,46 +1,100 @@
-from typing import List, Dict, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from .mood_tracker import MoodLevel
 
+# Mood to music attribute mappings
+MOOD_MAPPINGS = {
+    MoodLevel.HAPPY: {
+        'improve': {'valence': 0.8, 'energy': 0.8, 'tempo': (120, 140)},
+        'relate': {'valence': 0.7, 'energy': 0.7, 'tempo': (110, 130)}
+    },
+    MoodLevel.CALM: {
+        'improve': {'valence': 0.6, 'energy': 0.4, 'tempo': (70, 100)},
+        'relate': {'valence': 0.5, 'energy': 0.3, 'tempo': (60, 90)}
+    },
+    MoodLevel.NEUTRAL: {
+        'improve': {'valence': 0.6, 'energy': 0.6, 'tempo': (90, 120)},
+        'relate': {'valence': 0.5, 'energy': 0.5, 'tempo': (80, 110)}
+    },
+    MoodLevel.TENSE: {
+        'improve': {'valence': 0.7, 'energy': 0.4, 'tempo': (70, 100)},
+        'relate': {'valence': 0.3, 'energy': 0.6, 'tempo': (90, 120)}
+    },
+    MoodLevel.UPSET: {
+        'improve': {'valence': 0.8, 'energy': 0.5, 'tempo': (85, 110)},
+        'relate': {'valence': 0.2, 'energy': 0.4, 'tempo': (60, 90)}
+    }
+}
+
 class PlaylistGenerator:
-    def __init__(self, spotify_credentials: Dict[str, str]):
+    def __init__(self,
+                 spotify_credentials: Dict[str, str],
+                 seed_refresh_interval: float = 24 * 60 * 60):
         self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(**spotify_credentials))
         
-        # Mood to music attribute mappings
-        self.mood_mappings = {
-            MoodLevel.HAPPY: {
-                'improve': {'valence': 0.8, 'energy': 0.8, 'tempo': (120, 140)},
-                'relate': {'valence': 0.7, 'energy': 0.7, 'tempo': (110, 130)}
-            },
-            MoodLevel.CALM: {
-                'improve': {'valence': 0.6, 'energy': 0.4, 'tempo': (70, 100)},
-                'relate': {'valence': 0.5, 'energy': 0.3, 'tempo': (60, 90)}
-            },
-            MoodLevel.NEUTRAL: {
-                'improve': {'valence': 0.6, 'energy': 0.6, 'tempo': (90, 120)},
-                'relate': {'valence': 0.5, 'energy': 0.5, 'tempo': (80, 110)}
-            },
-            MoodLevel.TENSE: {
-                'improve': {'valence': 0.7, 'energy': 0.4, 'tempo': (70, 100)},
-                'relate': {'valence': 0.3, 'energy': 0.6, 'tempo': (90, 120)}
-            },
-            MoodLevel.UPSET: {
-                'improve': {'valence': 0.8, 'energy': 0.5, 'tempo': (85, 110)},
-                'relate': {'valence': 0.2, 'energy': 0.4, 'tempo': (60, 90)}
-            }
-        }
+        self.mood_mappings = MOOD_MAPPINGS
+        
+        # Recommendation seeds of the authenticated user (self.sp acts for a
+        # single user): (tracks, artists, fetched_at). Top tracks/artists
+        # change at most daily, so stale seeds are served while a background
+        # refresh runs.
+        self.seed_refresh_interval = seed_refresh_interval
+        self._seeds: Optional[Tuple[List[str], List[str], float]] = None
+        self._seed_refresh: Optional[Future] = None
+        self._seed_lock = threading.Lock()
+        self._seed_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='seed-fetch')
+
+    def _fetch_seeds(self) -> Tuple[List[str], List[str]]:
+        """Fetch the user's top tracks and artists concurrently"""
+        top_tracks_future = self._seed_executor.submit(
+            self.sp.current_user_top_tracks, limit=5, time_range='short_term'
+        )
+        top_artists = self.sp.current_user_top_artists(limit=5, time_range='short_term')
+        top_tracks = top_tracks_future.result()
+        
+        seed_tracks = [track['id'] for track in top_tracks['items'][:2]]
+        seed_artists = [artist['id'] for artist in top_artists['items'][:3]]
+        return seed_tracks, seed_artists
+
+    def _store_seeds(self) -> Tuple[List[str], List[str]]:
+        seed_tracks, seed_artists = self._fetch_seeds()
+        with self._seed_lock:
+            self._seeds = (seed_tracks, seed_artists, time.monotonic())
+        return seed_tracks, seed_artists
+
+    def _refresh_seeds_in_background(self) -> None:
+        with self._seed_lock:
+            if self._seed_refresh is not None and not self._seed_refresh.done():
+                return
+            # Failures keep the stale seeds; the next stale read retries
+            self._seed_refresh = self._seed_executor.submit(self._store_seeds)
+
+    def get_seeds(self) -> Tuple[List[str], List[str]]:
+        """Get cached seed tracks and artists for the authenticated user"""
+        cached = self._seeds
+        if cached is None:
+            return self._store_seeds()
+        
+        seed_tracks, seed_artists, fetched_at = cached
+        if time.monotonic() - fetched_at > self.seed_refresh_interval:
+            self._refresh_seeds_in_background()
+        return seed_tracks, seed_artists
+
+    def invalidate_seeds(self) -> None:
+        """Forget the cached seeds"""
+        with self._seed_lock:
+            self._seeds = None
 
     def get_recommendations(self, mood: MoodLevel, intent: str, limit: int = 20) -> List[Dict]:
         """Get song recommendations based on mood and intent"""
         params = self.mood_mappings[mood][intent]
         
         # Get user's top tracks and artists for better recommendations
-        top_tracks = self.sp.current_user_top_tracks(limit=5, time_range='short_term')
-        top_artists = self.sp.current_user_top_artists(limit=5, time_range='short_term')
-        
-        seed_tracks = [track['id'] for track in top_tracks['items'][:2]]
-        seed_artists = [artist['id'] for artist in top_artists['items'][:3]]
+        seed_tracks, seed_artists = self.get_seeds()
         
         recommendations = self.sp.recommendations(
             seed_tracks=seed_tracks,
@@ -0,0 +1,276 @@
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from .mood_tracker import MoodTracker, MoodEntry
+from .journal import JournalManager, JournalEntry, _month_bounds
+from ..services.cache import TTLCache
+
+class MoodRepository(ABC):
+    """Storage of mood entries, addressed by their public entry id"""
+
+    @abstractmethod
+    async def add(self, entry: MoodEntry) -> str:
+        pass
+
+    @abstractmethod
+    async def get(self, entry_id: str) -> Optional[MoodEntry]:
+        pass
+
+    @abstractmethod
+    async def find_range(self, start_date: datetime, end_date: datetime) -> List[MoodEntry]:
+        pass
+
+    def forget(self, entry_id: str) -> None:
+        """Drop any cached copy of an entry changed outside the repository"""
+        pass
+
+    async def ready(self) -> None:
+        """Wait until restored history can be served"""
+        pass
+
+class JournalRepository(ABC):
+    """Storage of journal entries plus the monthly review built from them"""
+
+    async def ready(self) -> None:
+        """Wait until restored history can be served"""
+        pass
+
+    @abstractmethod
+    async def add(self, entry: JournalEntry) -> str:
+        pass
+
+    @abstractmethod
+    async def get(self, entry_id: str) -> Optional[JournalEntry]:
+        pass
+
+    @abstractmethod
+    async def month_version(self, year: int, month: int) -> Tuple[int, Optional[datetime]]:
+        """Get a value that changes whenever the month changes, and when (UTC) it last did"""
+        pass
+
+    @abstractmethod
+    async def monthly_summary(self, year: int, month: int,
+                              version: Optional[Tuple] = None) -> Dict:
+        """Get the month's summary; pass `version` if month_version was already fetched"""
+        pass
+
+class _Restored:
+    """
+    Keeps the blocking parts of an in-memory tracker's persistence off the
+    event loop: restored history is indexed on a worker thread before the
+    first request touches the tracker, and logged entries are fsynced there.
+    """
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self._hydration: Optional[asyncio.Future] = None
+        self._hydrated = False
+
+    async def ready(self) -> None:
+        if self._hydrated:
+            return
+        if self._hydration is None:
+            self._hydration = asyncio.get_running_loop().run_in_executor(None, self.tracker.hydrate)
+        await asyncio.shield(self._hydration)
+        self._hydrated = True
+
+    async def sync(self) -> None:
+        log = self.tracker.log
+        if log is not None and log.sync_due():
+            await asyncio.get_running_loop().run_in_executor(None, log.sync)
+
+class InMemoryMoodRepository(MoodRepository):
+    """Mood entries held by this process's MoodTracker (single worker only)"""
+    def __init__(self, tracker: MoodTracker):
+        self.tracker = tracker
+        self._restored = _Restored(tracker)
+
+    async def ready(self) -> None:
+        await self._restored.ready()
+
+    async def add(self, entry: MoodEntry) -> str:
+        await self.ready()
+        self.tracker.add_entry(entry)
+        await self._restored.sync()
+        return entry.entry_id
+
+    async def get(self, entry_id: str) -> Optional[MoodEntry]:
+        await self.ready()
+        return self.tracker.get_entry(entry_id)
+
+    async def find_range(self, start_date: datetime, end_date: datetime) -> List[MoodEntry]:
+        await self.ready()
+        return self.tracker.get_entries_by_date(start_date, end_date)
+
+class InMemoryJournalRepository(JournalRepository):
+    """Journal entries held by this process's JournalManager (single worker only)"""
+    def __init__(self, manager: JournalManager):
+        self.manager = manager
+        self._restored = _Restored(manager)
+
+    async def ready(self) -> None:
+        await self._restored.ready()
+
+    async def add(self, entry: JournalEntry) -> str:
+        await self.ready()
+        self.manager.add_entry(entry)
+        await self._restored.sync()
+        return entry.entry_id
+
+    async def get(self, entry_id: str) -> Optional[JournalEntry]:
+        await self.ready()
+        return self.manager.get_entry(entry_id)
+
+    async def month_version(self, year: int, month: int) -> Tuple[int, Optional[datetime]]:
+        await self.ready()
+        return self.manager.month_version(year, month)
+
+    async def monthly_summary(self, year: int, month: int,
+                              version: Optional[Tuple] = None) -> Dict:
+        await self.ready()
+        return self.manager.get_monthly_summary(year, month)
+
+def _exact_timestamp(doc: Dict) -> str:
+    # BSON dates only keep milliseconds; the entry id carries the exact time
+    if 'entry_id' in doc:
+        return datetime.fromtimestamp(float(doc['entry_id'])).isoformat()
+    return doc['timestamp'].isoformat()
+
+def _id_filter(entry_id: str) -> Dict:
+    """Match an entry by its public id, or by ObjectId for documents written elsewhere"""
+    if ObjectId.is_valid(entry_id):
+        return {'$or': [{'entry_id': entry_id}, {'_id': ObjectId(entry_id)}]}
+    return {'entry_id': entry_id}
+
+class _ReadThrough:
+    """
+    Bounded read-through cache of entries by the id they were looked up
+    with (entry id or ObjectId). Kept apart from the in-process trackers so
+    repeated reads never add entries to their aggregates twice.
+    """
+    def __init__(self, collection, from_document, maxsize: int, ttl: float):
+        self.collection = collection
+        self.from_document = from_document
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, entry_id: str):
+        entry = self.cache.get(entry_id)
+        if entry is not None:
+            return entry
+        doc = await self.collection.find_one(_id_filter(entry_id))
+        if doc is None:
+            return None
+        entry = self.from_document(doc)
+        self.cache.set(entry_id, entry)
+        return entry
+
+class MongoMoodRepository(MoodRepository):
+    """
+    Mood entries shared by all workers through a MongoDB collection.
+    Lookups by id go through a small per-worker cache; entries updated
+    elsewhere may be served stale for up to `cache_ttl` seconds.
+    """
+    def __init__(self, collection, cache_size: int = 1024, cache_ttl: float = 60):
+        self.collection = collection
+        self._reads = _ReadThrough(collection, self.from_document, cache_size, cache_ttl)
+
+    @staticmethod
+    def to_document(entry: MoodEntry) -> Dict:
+        return {
+            **entry.to_dict(),
+            'entry_id': entry.entry_id,
+            'timestamp': entry.timestamp
+        }
+
+    @staticmethod
+    def from_document(doc: Dict) -> MoodEntry:
+        return MoodEntry.from_dict({**doc, 'timestamp': _exact_timestamp(doc)})
+
+    async def add(self, entry: MoodEntry) -> str:
+        await self.collection.insert_one(self.to_document(entry))
+        return entry.entry_id
+
+    async def get(self, entry_id: str) -> Optional[MoodEntry]:
+        return await self._reads.get(entry_id)
+
+    def forget(self, entry_id: str) -> None:
+        self._reads.cache.pop(entry_id)
+
+    async def find_range(self, start_date: datetime, end_date: datetime) -> List[MoodEntry]:
+        cursor = self.collection.find(
+            {'timestamp': {'$gte': start_date, '$lte': end_date}}
+        ).sort('timestamp', 1)
+        return [self.from_document(doc) async for doc in cursor]
+
+class MongoJournalRepository(JournalRepository):
+    """
+    Journal entries shared by all workers through a MongoDB collection.
+    Lookups by id go through a small per-worker cache (journal entries are
+    never modified). Monthly summaries are memoized per worker and
+    revalidated against the month's entry count and latest write, so every
+    worker sees new entries.
+    """
+    def __init__(self,
+                 collection,
+                 cache_size: int = 1024,
+                 cache_ttl: float = 600,
+                 top_songs: int = 10,
+                 top_themes: Optional[int] = None):
+        self.collection = collection
+        self.top_songs = top_songs
+        self.top_themes = top_themes
+        self._reads = _ReadThrough(collection, self.from_document, cache_size, cache_ttl)
+        self._summaries: Dict[Tuple[int, int], Tuple[Tuple, Dict]] = {}
+
+    @staticmethod
+    def to_document(entry: JournalEntry) -> Dict:
+        return {
+            **entry.to_dict(),
+            'entry_id': entry.entry_id,
+            'timestamp': entry.timestamp,
+            'created_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def from_document(doc: Dict) -> JournalEntry:
+        return JournalEntry.from_dict({**doc, 'timestamp': _exact_timestamp(doc)})
+
+    async def add(self, entry: JournalEntry) -> str:
+        await self.collection.insert_one(self.to_document(entry))
+        return entry.entry_id
+
+    async def get(self, entry_id: str) -> Optional[JournalEntry]:
+        return await self._reads.get(entry_id)
+
+    @staticmethod
+    def _month_filter(year: int, month: int) -> Dict:
+        start_date, end_date = _month_bounds(year, month)
+        return {'timestamp': {'$gte': start_date, '$lt': end_date}}
+
+    async def month_version(self, year: int, month: int) -> Tuple[int, Optional[datetime]]:
+        # Journal entries are only ever added, so (count, latest write) changes
+        # with every write to the month
+        async for row in self.collection.aggregate([
+            {'$match': self._month_filter(year, month)},
+            {'$group': {'_id': None, 'count': {'$sum': 1}, 'last': {'$max': '$created_at'}}}
+        ]):
+            last = row['last']
+            return row['count'], last.replace(tzinfo=timezone.utc) if last else None
+        return 0, None
+
+    async def monthly_summary(self, year: int, month: int,
+                              version: Optional[Tuple] = None) -> Dict:
+        if version is None:
+            version = await self.month_version(year, month)
+        cached = self._summaries.get((year, month))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # Build the summary with the same code as the in-memory manager
+        manager = JournalManager(top_songs=self.top_songs, top_themes=self.top_themes)
+        async for doc in self.collection.find(self._month_filter(year, month)):
+            manager.add_entry(self.from_document(doc))
+        summary = manager.get_monthly_summary(year, month)
+        self._summaries[(year, month)] = (version, summary)
+        return summary
@@ -1,16 +1,148 @@
-from typing import Dict, List
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import chain, zip_longest
+from typing import Dict, List, Optional, Tuple
+import jwt
 from applemusicpy import AppleMusic
 from .music_service import MusicService
+from .executor import run_blocking
+
+class DeveloperTokenCache:
+    """
+    Process-wide cache of signed Apple Music developer tokens (ES256 JWTs).
+    A token is signed once per key and reused until shortly before expiry.
+    """
+    # Tokens this close to expiry are re-signed
+    REFRESH_MARGIN = timedelta(minutes=15)
+
+    def __init__(self):
+        self._tokens: Dict[Tuple[str, str], Tuple[str, datetime]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.signings = 0
+        self.signing_time_total = 0.0
+
+    def needs_refresh(self, key_id: str, team_id: str) -> bool:
+        cached = self._tokens.get((key_id, team_id))
+        return cached is None or cached[1] - self.REFRESH_MARGIN <= datetime.now()
+
+    def get(self,
+            secret_key: str,
+            key_id: str,
+            team_id: str,
+            session_length: int = 12) -> Tuple[str, datetime]:
+        """Get a (token, valid_until) pair, signing a new token if needed"""
+        with self._lock:
+            if not self.needs_refresh(key_id, team_id):
+                self.hits += 1
+                return self._tokens[(key_id, team_id)]
+            token = self._sign(secret_key, key_id, team_id, session_length)
+            self._tokens[(key_id, team_id)] = token
+            return token
+
+    def _sign(self,
+              secret_key: str,
+              key_id: str,
+              team_id: str,
+              session_length: int) -> Tuple[str, datetime]:
+        started = time.perf_counter()
+        now = datetime.now()
+        valid_until = now + timedelta(hours=session_length)
+        token = jwt.encode(
+            {'iss': team_id, 'iat': int(now.timestamp()), 'exp': int(valid_until.timestamp())},
+            secret_key,
+            algorithm='ES256',
+            headers={'alg': 'ES256', 'kid': key_id}
+        )
+        if isinstance(token, bytes):
+            token = token.decode()
+        self.signings += 1
+        self.signing_time_total += time.perf_counter() - started
+        return token, valid_until
+
+    def stats(self) -> Dict:
+        return {
+            'tokens': len(self._tokens),
+            'hits': self.hits,
+            'signings': self.signings,
+            'signing_time_total': self.signing_time_total,
+            'signing_time_avg': self.signing_time_total / self.signings if self.signings else 0
+        }
+
+developer_tokens = DeveloperTokenCache()
+
+class CachedTokenAppleMusic(AppleMusic):
+    """AppleMusic client that takes its developer token from the shared cache"""
+    def generate_token(self, session_length):
+        self.token_str, self.token_valid_until = developer_tokens.get(
+            self._secret_key, self._key_id, self._team_id, session_length
+        )
+
+    def create_library_playlist(self,
+                                name: str,
+                                description: str,
+                                track_ids: List[str],
+                                user_token: str) -> Dict:
+        """
+        Create a playlist in the user's library. applemusicpy only covers the
+        catalog API and sends parameters in the query string, so this posts
+        the JSON body itself, authorized by the user's Music-User-Token.
+        """
+        if not self.token_is_valid():
+            self.generate_token(self.session_length)
+        body = {
+            'attributes': {'name': name, 'description': description},
+            'relationships': {
+                'tracks': {'data': [{'id': track_id, 'type': 'songs'} for track_id in track_ids]}
+            }
+        }
+        r = self._session.request(
+            'POST', self.root + 'me/library/playlists',
+            headers={**self._auth_headers(), 'Music-User-Token': user_token},
+            json=body,
+            proxies=self.proxies,
+            timeout=self.requests_timeout
+        )
+        r.raise_for_status()
+        return r.json()['data'][0]
 
 class AppleMusicService(MusicService):
+    name = 'apple_music'
+    # Genre searches issued concurrently for one recommendation request
+    MAX_PARALLEL_SEARCHES = 4
+    # Maximum ids accepted by the multiple-songs catalog endpoint
+    SONGS_BATCH_SIZE = 300
+
     def __init__(self, credentials: Dict[str, str]):
-        self.am = AppleMusic(
+        self.am = CachedTokenAppleMusic(
             secret_key=credentials['secret_key'],
             key_id=credentials['key_id'],
-            team_id=credentials['team_id']
+            team_id=credentials['team_id'],
+            # Retries are handled by the upstream scheduler
+            max_retries=0
         )
+        # Music-User-Token for the library the playlists are created in
+        self.user_token = credentials.get('user_token')
+
+    async def refresh_credentials(self) -> None:
+        # Re-sign off the request path before the token nears expiry
+        if developer_tokens.needs_refresh(self.am._key_id, self.am._team_id):
+            await run_blocking(self.am.generate_token, self.am.session_length)
+        else:
+            self.am.generate_token(self.am.session_length)
+
+    def generate_playlist(self, mood: str, intent: str) -> List[Dict]:
+        # Basic implementation
+        return []
+
+    async def _search_genre(self, genre: str, semaphore: asyncio.Semaphore) -> List[Dict]:
+        async with semaphore:
+            results = await self._call(self.am.search, genre, types=['songs'], limit=10)
+        return results['songs']['data'] if 'songs' in results else []
         
-    async def get_recommendations(self, mood: str) -> List[Dict]:
+    async def get_recommendations(self, mood: str, intent: Optional[str] = None) -> List[Dict]:
         # Map moods to Apple Music genres and attributes
         mood_mappings = {
             'HAPPY': ['pop', 'dance'],
@@ -22,33 +154,57 @@ class AppleMusicService(MusicService):
         
         genres = mood_mappings.get(mood, ['pop'])
         
-        # Get recommendations from Apple Music
+        # Search all genres concurrently
+        semaphore = asyncio.Semaphore(self.MAX_PARALLEL_SEARCHES)
+        results = await asyncio.gather(
+            *(self._search_genre(genre, semaphore) for genre in genres)
+        )
+        
+        # Interleave genres round-robin (in mapping order) and drop duplicates
         recommendations = []
-        for genre in genres:
-            results = self.am.search(genre, types=['songs'], limit=10)
-            if 'songs' in results:
-                recommendations.extend(results['songs']['data'])
+        seen = set()
+        for track in chain.from_iterable(zip_longest(*results)):
+            if track is not None and track['id'] not in seen:
+                seen.add(track['id'])
+                recommendations.append(track)
         
         # Format tracks to match common structure
-        return [{
-            'id': track['id'],
-            'name': track['attributes']['name'],
-            'artist': track['attributes']['artistName'],
-            'url': track['attributes']['url']
-        } for track in recommendations[:20]]
+        return [self._format_track(track) for track in recommendations[:20]]
 
     async def create_playlist(self, name: str, tracks: List[str]) -> str:
-        # Create a new playlist in Apple Music
-        playlist = self.am.create_playlist(
+        # Create a new playlist in the user's Apple Music library
+        if not self.user_token:
+            raise ValueError("Creating Apple Music playlists requires APPLE_MUSIC_USER_TOKEN")
+        playlist = await self._call(
+            self.am.create_library_playlist,
             name=name,
             description=f"Moodify playlist for {name}",
-            track_ids=tracks
+            track_ids=tracks,
+            user_token=self.user_token,
+            idempotent=False
         )
         
         return playlist['id']
 
     async def get_track_info(self, track_id: str) -> Dict:
-        track = self.am.song(track_id)
+        track = await self._call(self.am.song, track_id)
+        return self._format_track(track)
+
+    async def get_tracks_info(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        chunks = [
+            track_ids[i:i + self.SONGS_BATCH_SIZE]
+            for i in range(0, len(track_ids), self.SONGS_BATCH_SIZE)
+        ]
+        responses = await asyncio.gather(*(self._call(self.am.songs, chunk) for chunk in chunks))
+        # The catalog omits unknown ids, so realign results by id
+        found = {
+            track['id']: self._format_track(track)
+            for response in responses for track in response.get('data', [])
+        }
+        return [found.get(track_id) for track_id in track_ids]
+
+    @staticmethod
+    def _format_track(track: Dict) -> Dict:
         return {
             'id': track['id'],
             'name': track['attributes']['name'],
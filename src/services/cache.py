@@ -0,0 +1,181 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+    Not thread-safe; meant to be used from the event loop.
+    """
+    def __init__(self,
+                 maxsize: int = 1024,
+                 ttl: Optional[float] = 300,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at is not None and expires_at <= self.clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Any) -> bool:
+        item = self._data.get(key)
+        return item is not None and (item[1] is None or item[1] > self.clock())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+class RecommendationCache(ABC):
+    """Cache of recommendation results keyed by (service, mood, intent, seeds)"""
+
+    @staticmethod
+    def make_key(service: str, mood: Any, intent: Any, seeds: Iterable[str] = ()) -> str:
+        mood = getattr(mood, 'value', mood)
+        intent = getattr(intent, 'value', intent)
+        return f"{service}|{mood}|{intent}|{','.join(sorted(seeds))}"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, tracks: List[Dict], ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        pass
+
+class InMemoryRecommendationCache(RecommendationCache):
+    """Recommendation cache local to this worker process"""
+    def __init__(self, maxsize: int = 256, ttl: float = 600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, tracks: List[Dict], ttl: Optional[float] = None) -> None:
+        self._cache.set(key, tracks, ttl)
+
+    def stats(self) -> Dict:
+        return {'backend': 'memory', **self._cache.stats()}
+
+class MongoRecommendationCache(RecommendationCache):
+    """
+    Recommendation cache shared by all workers through a MongoDB collection.
+    Expired documents are removed by a TTL index (declared in core.indexes);
+    the size bound is enforced by evicting the least recently accessed
+    documents.
+    """
+    def __init__(self,
+                 collection,
+                 maxsize: int = 1024,
+                 ttl: float = 600,
+                 trim_every: int = 50):
+        self.collection = collection
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.trim_every = trim_every
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        now = datetime.utcnow()
+        doc = await self.collection.find_one_and_update(
+            {'_id': key, 'expires_at': {'$gt': now}},
+            {'$set': {'last_access': now}}
+        )
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return doc['tracks']
+
+    async def set(self, key: str, tracks: List[Dict], ttl: Optional[float] = None) -> None:
+        now = datetime.utcnow()
+        ttl = self.ttl if ttl is None else ttl
+        await self.collection.replace_one(
+            {'_id': key},
+            {
+                'tracks': tracks,
+                'expires_at': now + timedelta(seconds=ttl),
+                'last_access': now
+            },
+            upsert=True
+        )
+        self._writes += 1
+        if self._writes % self.trim_every == 0:
+            await self._trim()
+
+    async def _trim(self) -> None:
+        """Evict least recently used documents beyond the size bound"""
+        excess = await self.collection.estimated_document_count() - self.maxsize
+        if excess <= 0:
+            return
+        cursor = self.collection.find({}, {'_id': 1}).sort('last_access', 1).limit(excess)
+        stale_ids = [doc['_id'] async for doc in cursor]
+        if stale_ids:
+            result = await self.collection.delete_many({'_id': {'$in': stale_ids}})
+            self.evictions += result.deleted_count
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'mongo',
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+# Defaults applied to every provider's breaker
+BREAKER_CALL_TIMEOUT = float(os.getenv('BREAKER_CALL_TIMEOUT', '10'))  # seconds
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', '20'))  # calls considered
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', '10'))
+BREAKER_ERROR_RATE = float(os.getenv('BREAKER_ERROR_RATE', '0.5'))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', '3'))
+BREAKER_SLOW_CALL_RATE = float(os.getenv('BREAKER_SLOW_CALL_RATE', '0.8'))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv('BREAKER_HALF_OPEN_PROBES', '2'))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"{name} is unavailable (circuit open)")
+
+def http_status(exc: Exception) -> Optional[int]:
+    """HTTP status of a provider SDK error, if it carries one"""
+    status = getattr(exc, 'http_status', None)
+    response = getattr(exc, 'response', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+    return status
+
+def is_provider_failure(exc: Exception) -> bool:
+    """
+    Whether an error says the provider is unhealthy: a 5xx, a timeout or a
+    connection error. 4xx answers (404s, 429 rate limits) come from a
+    healthy provider. requests' HTTPError is an OSError, so the status is
+    checked first.
+    """
+    status = http_status(exc)
+    if status is not None:
+        return status >= 500
+    return isinstance(exc, (asyncio.TimeoutError, OSError))
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker. Calls are bounded by a timeout; once enough
+    of the recent calls fail or are slow the circuit opens and calls fail
+    fast. Only provider failures count (see is_provider_failure). After
+    `open_seconds` a few probe calls are let through (half-open) and their
+    outcome decides whether the circuit closes again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 name: str,
+                 timeout: float = BREAKER_CALL_TIMEOUT,
+                 window: int = BREAKER_WINDOW,
+                 min_calls: int = BREAKER_MIN_CALLS,
+                 error_rate: float = BREAKER_ERROR_RATE,
+                 slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+                 slow_call_rate: float = BREAKER_SLOW_CALL_RATE,
+                 open_seconds: float = BREAKER_OPEN_SECONDS,
+                 half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.timeout = timeout
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        # Recent outcomes as (failed, slow)
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        return self._state
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = self.clock()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def _close(self) -> None:
+        self._state = self.CLOSED
+        self._outcomes.clear()
+
+    def _before_call(self) -> None:
+        state = self.state
+        if state == self.OPEN or (
+            state == self.HALF_OPEN and self._probes_in_flight >= self.half_open_probes
+        ):
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+        if state == self.HALF_OPEN:
+            self._probes_in_flight += 1
+
+    def _record(self, failed: bool, elapsed: float) -> None:
+        slow = elapsed >= self.slow_call_seconds
+        if self._state == self.HALF_OPEN:
+            self._probes_in_flight -= 1
+            if failed or slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._close()
+            return
+        if self._state == self.OPEN:
+            # Finished after another call already opened the circuit
+            return
+
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for f, _ in self._outcomes if f)
+        slow_calls = sum(1 for _, s in self._outcomes if s)
+        if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_call_rate:
+            self._open()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `fn()` under the breaker's timeout and bookkeeping"""
+        self._before_call()
+        started = self.clock()
+        try:
+            result = await asyncio.wait_for(fn(), self.timeout)
+        except asyncio.CancelledError:
+            # The caller went away; that says nothing about the provider
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight -= 1
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+            self._record(is_provider_failure(e), self.clock() - started)
+            raise
+        self._record(False, self.clock() - started)
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            'state': self.state,
+            'recent_calls': len(self._outcomes),
+            'recent_failures': sum(1 for f, _ in self._outcomes if f),
+            'recent_slow_calls': sum(1 for _, s in self._outcomes if s),
+            'opened': self.opened,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts
+        }
@@ -0,0 +1,38 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+# The music SDKs (spotipy, applemusicpy) are synchronous and built on
+# requests, so every upstream call is pushed onto this bounded pool instead
+# of running on the event loop. The SDK sessions keep their connections
+# alive, so the pool size is also the upper bound on open upstream sockets.
+MAX_WORKERS = int(os.getenv('MUSIC_SERVICE_MAX_WORKERS', '16'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared executor for blocking music service calls"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_WORKERS,
+            thread_name_prefix='music-service'
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking SDK call in the shared executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """Shut down the shared executor (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -1,17 +1,131 @@
-from typing import Dict
+import asyncio
+import os
+from typing import Dict, Optional, Tuple
 from .music_service import MusicService
 from .spotify_service import SpotifyService
-# Comment out this line for now
-# from .apple_music_service import AppleMusicService
+from .local_service import LocalMusicService
+from .apple_music_service import AppleMusicService
+from .track_loader import TrackInfoLoader
 from ..api.models import MusicServiceEnum
 
+# Environment variables holding the credentials for each service
+CREDENTIAL_ENV_VARS = {
+    MusicServiceEnum.SPOTIFY: {
+        'client_id': 'SPOTIFY_CLIENT_ID',
+        'client_secret': 'SPOTIFY_CLIENT_SECRET',
+        'redirect_uri': 'SPOTIFY_REDIRECT_URI'
+    },
+    MusicServiceEnum.APPLE_MUSIC: {
+        'key_id': 'APPLE_MUSIC_KEY_ID',
+        'team_id': 'APPLE_MUSIC_TEAM_ID',
+        'secret_key': 'APPLE_MUSIC_SECRET_KEY',
+        'user_token': 'APPLE_MUSIC_USER_TOKEN'
+    },
+    MusicServiceEnum.LOCAL: {
+        'catalog_path': 'LOCAL_CATALOG_PATH'
+    }
+}
+
 class MusicServiceFactory:
+    """
+    Builds music services and keeps them alive between requests.
+    Services are pooled per (service type, credential set) so the SDK
+    client, its HTTP session and its OAuth token are reused.
+    """
+    _pool: Dict[Tuple, MusicService] = {}
+    _credentials: Dict[MusicServiceEnum, Dict[str, str]] = {}
+    _loaders: Dict[Tuple, TrackInfoLoader] = {}
+
+    @classmethod
+    def get_credentials(cls, service_type: MusicServiceEnum) -> Dict[str, str]:
+        """Get credentials for a service, reading the environment only once"""
+        if service_type not in cls._credentials:
+            env_vars = CREDENTIAL_ENV_VARS.get(service_type, {})
+            cls._credentials[service_type] = {
+                key: os.getenv(env_var) for key, env_var in env_vars.items()
+            }
+        return cls._credentials[service_type]
+
+    @classmethod
+    def get_service(cls,
+                    service_type: MusicServiceEnum,
+                    credentials: Optional[Dict] = None) -> MusicService:
+        if credentials is None:
+            credentials = cls.get_credentials(service_type)
+
+        key = cls._pool_key(service_type, credentials)
+        service = cls._pool.get(key)
+        if service is None:
+            service = cls._create_service(service_type, credentials)
+            cls._pool[key] = service
+        return service
+
+    @classmethod
+    def get_track_loader(cls,
+                         service_type: MusicServiceEnum,
+                         credentials: Optional[Dict] = None) -> TrackInfoLoader:
+        """Get the batching track-metadata loader for a pooled service"""
+        if credentials is None:
+            credentials = cls.get_credentials(service_type)
+
+        key = cls._pool_key(service_type, credentials)
+        loader = cls._loaders.get(key)
+        if loader is None:
+            loader = TrackInfoLoader(cls.get_service(service_type, credentials))
+            cls._loaders[key] = loader
+        return loader
+
+    @classmethod
+    def service_stats(cls) -> Dict:
+        return {key[0].value: service.stats() for key, service in cls._pool.items()}
+
+    @classmethod
+    def loader_stats(cls) -> Dict:
+        return {key[0].value: loader.stats() for key, loader in cls._loaders.items()}
+
+    @staticmethod
+    def _pool_key(service_type: MusicServiceEnum, credentials: Dict) -> Tuple:
+        return (service_type, tuple(sorted(credentials.items())))
+
     @staticmethod
-    def get_service(service_type: MusicServiceEnum, credentials: Dict) -> MusicService:
+    def _create_service(service_type: MusicServiceEnum, credentials: Dict) -> MusicService:
         if service_type == MusicServiceEnum.SPOTIFY:
             return SpotifyService(credentials)
-        # Comment out this block for now
-        # elif service_type == MusicServiceEnum.APPLE_MUSIC:
-        #     return AppleMusicService(credentials)
+        elif service_type == MusicServiceEnum.LOCAL:
+            return LocalMusicService(credentials)
+        elif service_type == MusicServiceEnum.APPLE_MUSIC:
+            return AppleMusicService(credentials)
         else:
-            raise ValueError("Only Spotify is supported currently") 
\ No newline at end of file
+            raise ValueError(f"Unsupported music service: {service_type}")
+
+    @classmethod
+    def invalidate(cls, service_type: Optional[MusicServiceEnum] = None) -> None:
+        """Drop pooled services (and cached credentials) for a service type, or all"""
+        if service_type is None:
+            cls._pool.clear()
+            cls._loaders.clear()
+            cls._credentials.clear()
+            return
+        cls._credentials.pop(service_type, None)
+        for key in [k for k in cls._pool if k[0] == service_type]:
+            del cls._pool[key]
+        for key in [k for k in cls._loaders if k[0] == service_type]:
+            del cls._loaders[key]
+
+    @classmethod
+    async def refresh_tokens(cls) -> None:
+        """Refresh tokens of all pooled services that are close to expiry"""
+        for service in list(cls._pool.values()):
+            try:
+                await service.refresh_credentials()
+            except Exception:
+                # A failed refresh is retried on the next pass; requests
+                # still fall back to the SDK's own refresh-on-expiry.
+                pass
+
+    @classmethod
+    async def run_token_refresher(cls, interval: float = 60) -> None:
+        """Background loop that keeps pooled tokens fresh"""
+        while True:
+            await asyncio.sleep(interval)
+            await cls.refresh_tokens()
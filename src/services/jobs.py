@@ -0,0 +1,220 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .scheduler import BACKGROUND, current_priority
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class PermanentJobError(Exception):
+    """Raised by a job handler for failures a retry cannot fix; the job fails at once"""
+    pass
+
+class PlaylistJobQueue:
+    """
+    Persistent job queue stored in a MongoDB collection. Any process holding
+    a queue with workers started will claim and run jobs, so workers can run
+    inside the API process or in a separate one (see api/worker.py).
+    A running job's lease is renewed while its handler runs; jobs whose
+    worker dies are picked up again once their lease expires, until they run
+    out of attempts.
+    """
+    def __init__(self,
+                 collection,
+                 handler: Callable[[Dict], Awaitable[Dict]],
+                 workers: int = 4,
+                 max_attempts: int = 3,
+                 retry_delay: float = 5,
+                 lease_seconds: float = 300,
+                 poll_interval: float = 1):
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def enqueue(self, payload: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        """Queue a job, or return the existing job for a repeated idempotency key"""
+        if idempotency_key:
+            existing = await self.collection.find_one({'idempotency_key': idempotency_key})
+            if existing:
+                return existing
+
+        now = datetime.utcnow()
+        job = {
+            'status': JobStatus.QUEUED,
+            'payload': payload,
+            'attempts': 0,
+            'max_attempts': self.max_attempts,
+            'run_at': now,
+            'created_at': now,
+            'updated_at': now,
+            'result': None,
+            'error': None
+        }
+        if idempotency_key:
+            job['idempotency_key'] = idempotency_key
+        try:
+            result = await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            # A concurrent request with the same key won the race
+            return await self.collection.find_one({'idempotency_key': idempotency_key})
+        job['_id'] = result.inserted_id
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({'_id': ObjectId(job_id)})
+
+    async def _claim(self) -> Optional[Dict]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {'$or': [
+                {'status': JobStatus.QUEUED, 'run_at': {'$lte': now}},
+                {
+                    'status': JobStatus.RUNNING,
+                    'lease_expires': {'$lt': now},
+                    '$expr': {'$lt': ['$attempts', '$max_attempts']}
+                }
+            ]},
+            {
+                '$set': {
+                    'status': JobStatus.RUNNING,
+                    'lease_expires': now + timedelta(seconds=self.lease_seconds),
+                    'updated_at': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('run_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _fail_abandoned(self) -> None:
+        """Fail jobs whose worker died during their last attempt"""
+        now = datetime.utcnow()
+        result = await self.collection.update_many(
+            {
+                'status': JobStatus.RUNNING,
+                'lease_expires': {'$lt': now},
+                '$expr': {'$gte': ['$attempts', '$max_attempts']}
+            },
+            {'$set': {
+                'status': JobStatus.FAILED,
+                'error': "Worker stopped during the last attempt",
+                'updated_at': now
+            }}
+        )
+        self.failed += result.modified_count
+
+    @staticmethod
+    def _owned(job: Dict) -> Dict:
+        # The attempt count changes on every claim, so it fences off updates
+        # from a worker whose lease was taken over
+        return {'_id': job['_id'], 'attempts': job['attempts']}
+
+    async def _renew_lease(self, job: Dict) -> None:
+        """Push the lease forward while the handler runs"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            now = datetime.utcnow()
+            result = await self.collection.update_one(
+                {**self._owned(job), 'status': JobStatus.RUNNING},
+                {'$set': {'lease_expires': now + timedelta(seconds=self.lease_seconds)}}
+            )
+            if not result.matched_count:
+                return
+
+    async def _run(self, job: Dict) -> None:
+        heartbeat = asyncio.create_task(self._renew_lease(job))
+        try:
+            result = await self.handler(job['payload'])
+        except Exception as e:
+            now = datetime.utcnow()
+            if job['attempts'] < job['max_attempts'] and not isinstance(e, PermanentJobError):
+                self.retried += 1
+                delay = self.retry_delay * 2 ** (job['attempts'] - 1)
+                update = {
+                    'status': JobStatus.QUEUED,
+                    'run_at': now + timedelta(seconds=delay),
+                    'error': str(e),
+                    'updated_at': now
+                }
+            else:
+                self.failed += 1
+                update = {'status': JobStatus.FAILED, 'error': str(e), 'updated_at': now}
+            await self.collection.update_one(self._owned(job), {'$set': update})
+            return
+        finally:
+            heartbeat.cancel()
+
+        self.succeeded += 1
+        await self.collection.update_one(
+            self._owned(job),
+            {'$set': {
+                'status': JobStatus.SUCCEEDED,
+                'result': result,
+                'error': None,
+                'updated_at': datetime.utcnow()
+            }}
+        )
+
+    async def _worker(self) -> None:
+        # Queued jobs wait behind interactive requests for upstream capacity
+        current_priority.set(BACKGROUND)
+        while True:
+            try:
+                job = await self._claim()
+                if job is None:
+                    await self._fail_abandoned()
+            except Exception:
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except Exception:
+                # Could not record the outcome; the job is re-run once its lease expires
+                pass
+
+    def start(self) -> None:
+        """Start the configured number of in-process workers"""
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stats(self) -> Dict:
+        counts = {}
+        async for row in self.collection.aggregate([
+            {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+        ]):
+            counts[row['_id']] = row['count']
+        return {
+            'workers': len(self._tasks),
+            'jobs': counts,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'retried': self.retried
+        }
@@ -0,0 +1,180 @@
+import csv
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .music_service import MusicService
+from ..core.mood_tracker import MoodLevel
+from ..core.playlist_generator import MOOD_MAPPINGS
+
+class TrackCatalog:
+    """
+    Track audio features held in contiguous NumPy arrays so recommendation
+    queries are a handful of vectorized operations over the whole catalog.
+    """
+    def __init__(self,
+                 ids: np.ndarray,
+                 valence: np.ndarray,
+                 energy: np.ndarray,
+                 tempo: np.ndarray,
+                 popularity: Optional[np.ndarray] = None,
+                 names: Optional[np.ndarray] = None,
+                 artists: Optional[np.ndarray] = None,
+                 urls: Optional[np.ndarray] = None):
+        self.ids = np.ascontiguousarray(ids, dtype=str)
+        self.valence = np.ascontiguousarray(valence, dtype=np.float32)
+        self.energy = np.ascontiguousarray(energy, dtype=np.float32)
+        self.tempo = np.ascontiguousarray(tempo, dtype=np.float32)
+        # Popularity is normalised to [0, 1]; missing means "all equal" and
+        # blank cells count as 0
+        if popularity is None:
+            self.popularity = np.zeros(len(self.ids), dtype=np.float32)
+        else:
+            popularity = np.asarray(popularity)
+            if popularity.dtype.kind in 'US':
+                popularity = np.where(np.char.strip(popularity) == '', 'nan', popularity)
+            popularity = np.nan_to_num(popularity.astype(np.float32), nan=0.0)
+            peak = popularity.max() if len(popularity) else 0
+            self.popularity = np.ascontiguousarray(popularity / peak if peak > 0 else popularity)
+        self.names = names
+        self.artists = artists
+        self.urls = urls
+        self._index = {track_id: i for i, track_id in enumerate(self.ids.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path: str) -> 'TrackCatalog':
+        """Load a catalog from a .npz, .csv or .parquet file"""
+        suffix = Path(path).suffix.lower()
+        if suffix == '.npz':
+            with np.load(path, allow_pickle=False) as data:
+                columns = {key: data[key] for key in data.files}
+        elif suffix == '.csv':
+            with open(path, newline='') as f:
+                rows = list(csv.DictReader(f))
+            columns = {
+                key: np.array([row[key] for row in rows])
+                for key in (rows[0].keys() if rows else ())
+            }
+        elif suffix == '.parquet':
+            try:
+                import pandas as pd
+            except ImportError:
+                raise ImportError("Reading Parquet catalogs requires pandas and pyarrow")
+            frame = pd.read_parquet(path)
+            columns = {key: frame[key].to_numpy() for key in frame.columns}
+        else:
+            raise ValueError(f"Unsupported catalog format: {suffix}")
+        return cls.from_columns(columns)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> 'TrackCatalog':
+        missing = {'id', 'valence', 'energy', 'tempo'} - set(columns)
+        if missing:
+            raise ValueError(f"Catalog is missing columns: {', '.join(sorted(missing))}")
+        return cls(
+            ids=columns['id'],
+            valence=columns['valence'],
+            energy=columns['energy'],
+            tempo=columns['tempo'],
+            popularity=columns.get('popularity'),
+            names=columns.get('name'),
+            artists=columns.get('artist'),
+            urls=columns.get('url')
+        )
+
+    def query(self,
+              valence: float,
+              energy: float,
+              tempo: Tuple[float, float],
+              limit: int = 20,
+              popularity_weight: float = 0.05) -> np.ndarray:
+        """
+        Get indices of the tracks closest to the target features.
+        Tracks outside the tempo window are penalised rather than dropped,
+        so small catalogs still return a full batch.
+        """
+        min_tempo, max_tempo = tempo
+        tempo_miss = np.maximum(min_tempo - self.tempo, 0) + np.maximum(self.tempo - max_tempo, 0)
+        scores = (
+            np.square(self.valence - valence)
+            + np.square(self.energy - energy)
+            + np.square(tempo_miss / 100)
+            - popularity_weight * self.popularity
+        )
+        limit = min(limit, len(scores))
+        if limit <= 0:
+            return np.empty(0, dtype=np.intp)
+        top = np.argpartition(scores, limit - 1)[:limit]
+        return top[np.argsort(scores[top], kind='stable')]
+
+    def track(self, i: int) -> Dict:
+        return {
+            'id': str(self.ids[i]),
+            'name': str(self.names[i]) if self.names is not None else None,
+            'artist': str(self.artists[i]) if self.artists is not None else None,
+            'url': str(self.urls[i]) if self.urls is not None else None,
+            'valence': float(self.valence[i]),
+            'energy': float(self.energy[i]),
+            'tempo': float(self.tempo[i])
+        }
+
+    def get(self, track_id: str) -> Optional[Dict]:
+        i = self._index.get(track_id)
+        return None if i is None else self.track(i)
+
+class LocalMusicService(MusicService):
+    """
+    Offline recommendations from a local track-feature catalog.
+    Needs no network access, so it also serves as a fallback when the
+    remote provider is slow or down.
+    """
+    name = 'local'
+
+    # Catalogs are shared by every service instance using the same file
+    _catalogs: Dict[str, TrackCatalog] = {}
+
+    def __init__(self, credentials: Dict[str, str]):
+        path = credentials['catalog_path']
+        if path not in self._catalogs:
+            self._catalogs[path] = TrackCatalog.load(path)
+        self.catalog = self._catalogs[path]
+        self.playlists: Dict[str, List[str]] = {}
+
+    def _recommend(self, mood: str, intent: Optional[str], limit: int = 20) -> List[Dict]:
+        mood = getattr(mood, 'value', mood)
+        intent = getattr(intent, 'value', intent) or 'improve'
+        mood_level = MoodLevel.__members__.get(mood, MoodLevel.NEUTRAL)
+        params = MOOD_MAPPINGS[mood_level][intent]
+        indices = self.catalog.query(
+            params['valence'], params['energy'], params['tempo'], limit=limit
+        )
+        return [self._format_track(self.catalog.track(i)) for i in indices]
+
+    def generate_playlist(self, mood: str, intent: str) -> List[Dict]:
+        return self._recommend(mood, intent)
+
+    async def get_recommendations(self, mood: str, intent: Optional[str] = None) -> List[Dict]:
+        # Pure in-memory computation; no need to leave the event loop
+        return self._recommend(mood, intent)
+
+    async def create_playlist(self, name: str, tracks: List[str]) -> str:
+        playlist_id = f"local:{uuid.uuid4().hex}"
+        self.playlists[playlist_id] = list(tracks)
+        return playlist_id
+
+    async def get_track_info(self, track_id: str) -> Dict:
+        track = self.catalog.get(track_id)
+        if track is None:
+            raise KeyError(f"Track {track_id} is not in the local catalog")
+        return self._format_track(track)
+
+    async def get_tracks_info(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        tracks = (self.catalog.get(track_id) for track_id in track_ids)
+        return [self._format_track(track) if track else None for track in tracks]
+
+    @staticmethod
+    def _format_track(track: Dict) -> Dict:
+        return {key: track[key] for key in ('id', 'name', 'artist', 'url')}
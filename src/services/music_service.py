@@ -1,7 +1,14 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .scheduler import get_scheduler
 
 class MusicService(ABC):
+    # Identifies the provider in cache keys and metrics
+    name: str = 'unknown'
+    # Seeds the provider feeds into its recommendation queries
+    seed_genres: Tuple[str, ...] = ()
+
     @abstractmethod
     def __init__(self, credentials: Dict):
         pass
@@ -11,7 +18,8 @@ class MusicService(ABC):
         pass
 
     @abstractmethod
-    async def get_recommendations(self, mood: str) -> List[Dict]:
+    async def get_recommendations(self, mood: str, intent: Optional[str] = None) -> List[Dict]:
+        """Providers that only map moods may ignore the intent"""
         pass
         
     @abstractmethod
@@ -20,4 +28,29 @@ class MusicService(ABC):
 
     @abstractmethod
     async def get_track_info(self, track_id: str) -> Dict:
-        pass 
\ No newline at end of file
+        pass
+
+    async def get_tracks_info(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Get info for several tracks, aligned with `track_ids` (None for unknown
+        tracks). Providers with a multi-track endpoint override this.
+        """
+        return list(await asyncio.gather(*(self.get_track_info(t) for t in track_ids)))
+
+    async def _call(self, func: Callable, *args, idempotent: bool = True, **kwargs) -> Any:
+        """
+        Run a blocking SDK call through the shared upstream scheduler.
+        Writes pass idempotent=False so they are not retried after a failure
+        that may have happened once the provider had applied them.
+        """
+        return await get_scheduler().call(
+            self.name, func, *args, idempotent=idempotent, **kwargs
+        )
+
+    async def refresh_credentials(self) -> None:
+        """Refresh auth tokens ahead of expiry (no-op by default)"""
+        pass
+
+    def stats(self) -> Dict:
+        """Provider-specific performance counters"""
+        return {}
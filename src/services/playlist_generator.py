@@ -1,34 +1,137 @@
-from typing import List, Dict
+import asyncio
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from .music_service import MusicService
+from .cache import RecommendationCache
+from .coalescing import SingleFlight
+from .prefetch import RecommendationPool
+from .circuit_breaker import CircuitOpenError
 from ..api.models import MoodEnum, IntentEnum
 
 class PlaylistGenerator:
-    def __init__(self, music_service: MusicService):
+    def __init__(self,
+                 music_service: MusicService,
+                 cache: Optional[RecommendationCache] = None,
+                 flights: Optional[SingleFlight] = None,
+                 fallback: Optional[MusicService] = None,
+                 timeout: Optional[float] = None,
+                 pool: Optional[RecommendationPool] = None):
         self.music_service = music_service
+        self.cache = cache
+        self.flights = flights
+        # Service used when the primary one fails or exceeds the timeout
+        self.fallback = fallback
+        self.timeout = timeout
+        # Pre-fetched tracklists for this service, drawn before any live call
+        self.pool = pool
     
-    async def generate_mood_playlist(
-        self,
-        mood: MoodEnum,
-        intent: IntentEnum,
-        context: str = None
-    ) -> Dict:
-        # Get recommendations
-        tracks = await self.music_service.get_recommendations(mood)
+    async def get_recommendations(self, mood: MoodEnum, intent: IntentEnum) -> List[Dict]:
+        """
+        Get recommendations, serving them from the cache when possible and
+        sharing one upstream call between concurrent identical requests
+        """
+        tracks, _ = await self._recommend(mood, intent)
+        return tracks
+    
+    async def _recommend(self, mood: MoodEnum, intent: IntentEnum) -> Tuple[List[Dict], bool]:
+        """Get recommendations and whether they came from the degraded fallback"""
+        key = RecommendationCache.make_key(
+            self.music_service.name, mood, intent, self.music_service.seed_genres
+        )
+        if self.cache is not None:
+            tracks = await self.cache.get(key)
+            if tracks is not None:
+                return tracks, False
         
+        if self.flights is None:
+            return await self._fetch_recommendations(key, mood, intent)
+        return await self.flights.do(
+            key, lambda: self._fetch_recommendations(key, mood, intent)
+        )
+    
+    async def _fetch_recommendations(self,
+                                     key: str,
+                                     mood: MoodEnum,
+                                     intent: IntentEnum) -> Tuple[List[Dict], bool]:
+        try:
+            tracks = await asyncio.wait_for(
+                self.music_service.get_recommendations(mood, intent),
+                self.timeout
+            )
+        except Exception:
+            # Includes CircuitOpenError, raised without waiting while the
+            # provider's breaker is open
+            if self.fallback is None:
+                raise
+            # Fallback results are not cached under the primary service's key
+            return await self.fallback.get_recommendations(mood, intent), True
+        
+        if self.cache is not None:
+            await self.cache.set(key, tracks)
+        return tracks, False
+    
+    async def _get_tracks(self, mood: MoodEnum, intent: IntentEnum) -> Tuple[List[Dict], bool]:
+        # Get recommendations, preferring a pre-fetched tracklist
+        tracks = self.pool.take(mood, intent) if self.pool else None
+        if tracks is not None:
+            return tracks, False
+        return await self._recommend(mood, intent)
+    
+    async def _create_playlist(self,
+                               mood: MoodEnum,
+                               tracks: List[Dict],
+                               context: str = None) -> Optional[str]:
         # Create playlist name
         playlist_name = f"Moodify - {mood}"
         if context:
             playlist_name += f" - {context[:30]}"
             
-        # Create playlist
-        playlist_id = await self.music_service.create_playlist(
-            playlist_name,
-            [track['id'] for track in tracks]
-        )
+        # Create playlist; while the provider's circuit is open the tracks
+        # are still returned, just without a remote playlist
+        try:
+            return await self.music_service.create_playlist(
+                playlist_name,
+                [track['id'] for track in tracks]
+            )
+        except CircuitOpenError:
+            return None
+    
+    async def generate_mood_playlist(
+        self,
+        mood: MoodEnum,
+        intent: IntentEnum,
+        context: str = None
+    ) -> Dict:
+        tracks, degraded = await self._get_tracks(mood, intent)
+        playlist_id = await self._create_playlist(mood, tracks, context)
         
         return {
             'playlist_id': playlist_id,
             'tracks': tracks,
             'mood': mood,
-            'intent': intent
-        } 
\ No newline at end of file
+            'intent': intent,
+            'degraded': degraded or playlist_id is None
+        }
+    
+    async def stream_mood_playlist(
+        self,
+        mood: MoodEnum,
+        intent: IntentEnum,
+        context: str = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Same flow as generate_mood_playlist, but yields ('track', track) events
+        as soon as recommendations arrive and a final ('playlist', ...) event
+        once the playlist has been created
+        """
+        tracks, degraded = await self._get_tracks(mood, intent)
+        for track in tracks:
+            yield 'track', track
+        
+        playlist_id = await self._create_playlist(mood, tracks, context)
+        yield 'playlist', {
+            'playlist_id': playlist_id,
+            'track_count': len(tracks),
+            'mood': mood,
+            'intent': intent,
+            'degraded': degraded or playlist_id is None
+        }
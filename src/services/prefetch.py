@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from .music_service import MusicService
+from .scheduler import BACKGROUND, current_priority
+from ..api.models import MoodEnum, IntentEnum
+
+class RecommendationPool:
+    """
+    Keeps a rotating pool of pre-fetched tracklists for every (mood, intent)
+    combination so the request path only has to create the playlist.
+    Each refill pass fetches one fresh tracklist per combination and drops
+    the oldest once a pool holds `depth` tracklists.
+    """
+    def __init__(self,
+                 get_service: Callable[[], MusicService],
+                 depth: int = 3,
+                 refill_interval: float = 60):
+        # Resolved on every refill so credential changes are picked up
+        self.get_service = get_service
+        self.depth = depth
+        self.refill_interval = refill_interval
+        self._pools: Dict[Tuple[str, str], Deque[List[Dict]]] = {
+            (mood.value, intent.value): deque(maxlen=depth)
+            for mood in MoodEnum for intent in IntentEnum
+        }
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.errors = 0
+
+    @staticmethod
+    def _key(mood, intent) -> Tuple[str, str]:
+        return (getattr(mood, 'value', mood), getattr(intent, 'value', intent))
+
+    def take(self, mood: MoodEnum, intent: IntentEnum) -> Optional[List[Dict]]:
+        """Get the next pooled tracklist, or None if the pool is empty"""
+        pool = self._pools.get(self._key(mood, intent))
+        if not pool:
+            self.misses += 1
+            return None
+        self.hits += 1
+        tracks = pool[0]
+        pool.rotate(-1)
+        return tracks
+
+    async def refill(self) -> None:
+        """Fetch one fresh tracklist for every combination"""
+        service = self.get_service()
+        for (mood, intent), pool in self._pools.items():
+            try:
+                tracks = await service.get_recommendations(mood, intent)
+            except Exception:
+                self.errors += 1
+                continue
+            self.fetches += 1
+            if tracks:
+                pool.append(tracks)
+
+    async def run(self) -> None:
+        """Background loop refilling the pool at the configured rate"""
+        # Refills queue behind interactive requests for upstream capacity
+        current_priority.set(BACKGROUND)
+        while True:
+            await self.refill()
+            await asyncio.sleep(self.refill_interval)
+
+    def stats(self) -> Dict:
+        return {
+            'depth': self.depth,
+            'pooled': sum(len(pool) for pool in self._pools.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'fetches': self.fetches,
+            'errors': self.errors
+        }
@@ -0,0 +1,243 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .executor import run_blocking
+from .circuit_breaker import CircuitBreaker, http_status, is_provider_failure
+
+# Priority lanes; lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Priority of upstream calls made from the current task. Background jobs set
+# this once at their entry point instead of threading it through every call.
+current_priority = ContextVar('upstream_priority', default=INTERACTIVE)
+
+# Defaults applied to every service unless configured otherwise
+UPSTREAM_RATE = float(os.getenv('UPSTREAM_RATE', '10'))  # requests per second
+UPSTREAM_BURST = int(os.getenv('UPSTREAM_BURST', '20'))
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv('UPSTREAM_MAX_CONCURRENCY', '8'))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', '3'))
+
+class UpstreamRateLimited(Exception):
+    """Raised when a provider keeps answering 429 after all retries"""
+    def __init__(self, service: str, retry_after: Optional[float] = None):
+        self.service = service
+        self.retry_after = retry_after
+        super().__init__(f"{service} rate limit exceeded")
+
+class TokenBucket:
+    """
+    Token bucket handing out reservations: each call takes a token and is
+    told how long to wait for it, so waiters are served in arrival order.
+    """
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it"""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold every reservation back for `seconds` (e.g. from Retry-After)"""
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+class PriorityGate:
+    """Concurrency limit whose waiters are admitted in priority order"""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        if self.active < self.limit and not self.depth():
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        # Hand the slot straight to the highest-priority live waiter
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def depth(self, priority: Optional[int] = None) -> int:
+        return sum(
+            1 for p, _, future in self._waiters
+            if not future.done() and (priority is None or p == priority)
+        )
+
+class _ServiceLane:
+    """Rate limit, concurrency limit, circuit breaker and counters for one provider"""
+    def __init__(self, service: str, rate: float, burst: int, max_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.gate = PriorityGate(max_concurrency)
+        self.breaker = CircuitBreaker(service)
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.throttled = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_time_total += seconds
+        self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'in_flight': self.gate.active,
+            'queue_depth': {
+                'interactive': self.gate.depth(INTERACTIVE),
+                'background': self.gate.depth(BACKGROUND)
+            },
+            'wait_time_avg': self.wait_time_total / self.calls if self.calls else 0,
+            'wait_time_max': self.wait_time_max,
+            'throttled': self.throttled,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'circuit': self.breaker.stats()
+        }
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(exc, 'headers', None)
+    response = getattr(exc, 'response', None)
+    if headers is None and response is not None:
+        headers = getattr(response, 'headers', None)
+    try:
+        return float(headers['Retry-After']) if headers else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _release_when_done(gate: PriorityGate, work: asyncio.Future) -> None:
+    def release(future: asyncio.Future) -> None:
+        if not future.cancelled():
+            future.exception()  # retrieved so it is not logged as unhandled
+        gate.release()
+    work.add_done_callback(release)
+
+class UpstreamScheduler:
+    """
+    Single entry point for blocking music provider calls. Applies a per-service
+    token bucket and concurrency cap, serves interactive calls before
+    background ones, and retries 429/5xx/connection errors with jittered
+    exponential backoff, honouring Retry-After. Non-idempotent calls (writes)
+    are only retried on 429, since after a 5xx or a dropped connection the
+    write may already have been applied. Every attempt runs through the
+    provider's circuit breaker, which fails fast while it is open.
+    """
+    def __init__(self,
+                 rate: float = UPSTREAM_RATE,
+                 burst: int = UPSTREAM_BURST,
+                 max_concurrency: int = UPSTREAM_MAX_CONCURRENCY,
+                 max_retries: int = UPSTREAM_MAX_RETRIES,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lanes: Dict[str, _ServiceLane] = {}
+
+    def _lane(self, service: str) -> _ServiceLane:
+        if service not in self._lanes:
+            self._lanes[service] = _ServiceLane(
+                service, self.rate, self.burst, self.max_concurrency
+            )
+        return self._lanes[service]
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform between 0 and the exponential ceiling
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, service: str, func: Callable, *args,
+                   priority: Optional[int] = None, idempotent: bool = True, **kwargs) -> Any:
+        """
+        Run a blocking provider call under the service's limits.
+        Pass idempotent=False for calls that must not be repeated on an
+        ambiguous failure (e.g. creating a playlist or appending tracks).
+        """
+        lane = self._lane(service)
+        priority = current_priority.get() if priority is None else priority
+        attempt = 0
+        while True:
+            queued_at = time.monotonic()
+            await lane.gate.acquire(priority)
+            work = None
+            try:
+                delay = lane.bucket.reserve()
+                if delay > 0:
+                    lane.throttled += 1
+                    await asyncio.sleep(delay)
+                lane.calls += 1
+                lane.record_wait(time.monotonic() - queued_at)
+                work = asyncio.ensure_future(run_blocking(func, *args, **kwargs))
+                return await lane.breaker.call(lambda: asyncio.shield(work))
+            except Exception as exc:
+                status = http_status(exc)
+                retry_after = _retry_after(exc)
+                if status == 429:
+                    lane.rate_limited += 1
+                    lane.bucket.pause(retry_after or self._backoff(attempt))
+                elif (not idempotent or isinstance(exc, asyncio.TimeoutError)
+                      or not is_provider_failure(exc)):
+                    # Timeouts are left to the circuit breaker rather than retried;
+                    # a 429 is a rejection, so only it is safe to retry for writes
+                    raise
+                if attempt >= self.max_retries:
+                    if status == 429:
+                        raise UpstreamRateLimited(service, retry_after) from exc
+                    raise
+            finally:
+                if work is not None and not work.done():
+                    # A timed out or abandoned call keeps running in its thread;
+                    # it holds its concurrency slot until it actually finishes
+                    _release_when_done(lane.gate, work)
+                else:
+                    lane.gate.release()
+            lane.retries += 1
+            attempt += 1
+            await asyncio.sleep(retry_after if retry_after is not None else self._backoff(attempt))
+
+    def stats(self) -> Dict:
+        return {service: lane.stats() for service, lane in self._lanes.items()}
+
+_scheduler: Optional[UpstreamScheduler] = None
+
+def get_scheduler() -> UpstreamScheduler:
+    """Get the process-wide upstream scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = UpstreamScheduler()
+    return _scheduler
@@ -1,24 +1,59 @@
-from typing import Dict, List
+import asyncio
+import time
+from typing import Dict, List, Optional
 from .music_service import MusicService
+from .executor import run_blocking
+import requests
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 
 class SpotifyService(MusicService):
+    name = 'spotify'
+    seed_genres = ('pop', 'rock')
+    # Refresh the access token when it has less than this many seconds left
+    TOKEN_REFRESH_MARGIN = 300
+    # Maximum ids accepted by the multi-track endpoint
+    TRACKS_BATCH_SIZE = 50
+    # Maximum items accepted per add-items request
+    PLAYLIST_CHUNK_SIZE = 100
+
     def __init__(self, credentials: Dict[str, str]):
         # Unpack credentials correctly for SpotifyOAuth
-        auth_manager = SpotifyOAuth(
+        self.auth_manager = SpotifyOAuth(
             client_id=credentials['client_id'],
             client_secret=credentials['client_secret'],
             redirect_uri=credentials['redirect_uri'],
             scope='playlist-modify-public playlist-modify-private user-top-read'
         )
-        self.sp = spotipy.Spotify(auth_manager=auth_manager)
+        # Retries are left to the upstream scheduler so 429s and 5xx surface
+        # with their status and Retry-After header. A plain session has no
+        # urllib3 Retry adapter; spotipy's own one would turn any 5xx into a
+        # header-less 429 once its (zero) retries were used up.
+        self.sp = spotipy.Spotify(
+            auth_manager=self.auth_manager,
+            requests_session=requests.Session()
+        )
+        self._user_id: Optional[str] = None
+        self.playlist_chunks = 0
+        self.playlist_chunk_time_total = 0.0
+        self.playlist_chunk_time_max = 0.0
+        self.last_chunk_timings: List[float] = []
+
+    async def refresh_credentials(self) -> None:
+        await run_blocking(self._refresh_token_if_needed)
+
+    def _refresh_token_if_needed(self) -> None:
+        token_info = self.auth_manager.cache_handler.get_cached_token()
+        if not token_info or not token_info.get('refresh_token'):
+            return
+        if token_info['expires_at'] - time.time() < self.TOKEN_REFRESH_MARGIN:
+            self.auth_manager.refresh_access_token(token_info['refresh_token'])
 
     def generate_playlist(self, mood: str, intent: str) -> List[Dict]:
         # Basic implementation
         return []
 
-    async def get_recommendations(self, mood: str) -> List[Dict]:
+    async def get_recommendations(self, mood: str, intent: Optional[str] = None) -> List[Dict]:
         # Map moods to audio features
         mood_features = {
             'HAPPY': {'valence': 0.8, 'energy': 0.8},
@@ -31,8 +66,9 @@ class SpotifyService(MusicService):
         features = mood_features.get(mood, {'valence': 0.5, 'energy': 0.5})
         
         # Get recommendations from Spotify
-        recommendations = self.sp.recommendations(
-            seed_genres=['pop', 'rock'],
+        recommendations = await self._call(
+            self.sp.recommendations,
+            seed_genres=list(self.seed_genres),
             target_valence=features['valence'],
             target_energy=features['energy'],
             limit=20
@@ -40,24 +76,81 @@ class SpotifyService(MusicService):
         
         return recommendations['tracks']
 
+    async def _get_user_id(self) -> str:
+        # The pooled client always acts for the same user
+        if self._user_id is None:
+            self._user_id = (await self._call(self.sp.me))['id']
+        return self._user_id
+
     async def create_playlist(self, name: str, tracks: List[str]) -> str:
         # Create a new playlist
-        user_id = self.sp.me()['id']
-        playlist = self.sp.user_playlist_create(
+        user_id = await self._get_user_id()
+        playlist = await self._call(
+            self.sp.user_playlist_create,
             user_id,
             name,
             public=False,
-            description=f"Moodify playlist for {name}"
+            description=f"Moodify playlist for {name}",
+            idempotent=False
         )
         
         # Add tracks to playlist
         if tracks:
-            self.sp.playlist_add_items(playlist['id'], tracks)
+            await self._add_tracks(playlist['id'], tracks)
             
         return playlist['id']
 
+    async def _add_tracks(self, playlist_id: str, tracks: List[str]) -> None:
+        """
+        Add tracks in upstream-sized chunks. Each chunk is appended as soon as
+        the previous one is acknowledged: Spotify only accepts positions
+        within the current playlist length, so overlapping appends could
+        reorder the tracks.
+        """
+        timings = []
+        for i in range(0, len(tracks), self.PLAYLIST_CHUNK_SIZE):
+            started = time.perf_counter()
+            await self._call(
+                self.sp.playlist_add_items,
+                playlist_id,
+                tracks[i:i + self.PLAYLIST_CHUNK_SIZE],
+                idempotent=False
+            )
+            timings.append(time.perf_counter() - started)
+        
+        self.last_chunk_timings = timings
+        self.playlist_chunks += len(timings)
+        self.playlist_chunk_time_total += sum(timings)
+        self.playlist_chunk_time_max = max([self.playlist_chunk_time_max] + timings)
+
+    def stats(self) -> Dict:
+        return {
+            'playlist_chunks': self.playlist_chunks,
+            'playlist_chunk_time_avg': (
+                self.playlist_chunk_time_total / self.playlist_chunks
+                if self.playlist_chunks else 0
+            ),
+            'playlist_chunk_time_max': self.playlist_chunk_time_max,
+            'last_chunk_timings': self.last_chunk_timings
+        }
+
     async def get_track_info(self, track_id: str) -> Dict:
-        track = self.sp.track(track_id)
+        track = await self._call(self.sp.track, track_id)
+        return self._format_track(track)
+
+    async def get_tracks_info(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        chunks = [
+            track_ids[i:i + self.TRACKS_BATCH_SIZE]
+            for i in range(0, len(track_ids), self.TRACKS_BATCH_SIZE)
+        ]
+        responses = await asyncio.gather(*(self._call(self.sp.tracks, chunk) for chunk in chunks))
+        return [
+            self._format_track(track) if track else None
+            for response in responses for track in response['tracks']
+        ]
+
+    @staticmethod
+    def _format_track(track: Dict) -> Dict:
         return {
             'id': track['id'],
             'name': track['name'],
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Dict, List, Optional
+from .cache import TTLCache
+from .music_service import MusicService
+
+_MISSING = object()
+
+class TrackInfoLoader:
+    """
+    Micro-batching loader for track metadata. Individual lookups made within
+    a short window are gathered into one `get_tracks_info` call, and results
+    are kept in a bounded metadata cache.
+    """
+    def __init__(self,
+                 music_service: MusicService,
+                 window: float = 0.005,
+                 max_batch: int = 50,
+                 cache_size: int = 10000,
+                 cache_ttl: float = 24 * 60 * 60):
+        self.music_service = music_service
+        self.window = window
+        self.max_batch = max_batch
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.batched_ids = 0
+
+    async def load(self, track_id: str) -> Optional[Dict]:
+        """Get info for one track (None if the provider does not know it)"""
+        info = self.cache.get(track_id, _MISSING)
+        if info is not _MISSING:
+            return info
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(track_id, []).append(future)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    async def load_many(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        return list(await asyncio.gather(*(self.load(t) for t in track_ids)))
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            asyncio.ensure_future(self._dispatch(pending))
+
+    async def _dispatch(self, pending: Dict[str, List[asyncio.Future]]) -> None:
+        track_ids = list(pending)
+        self.batches += 1
+        self.batched_ids += len(track_ids)
+        try:
+            infos = await self.music_service.get_tracks_info(track_ids)
+        except Exception as exc:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+
+        for track_id, info in zip(track_ids, infos):
+            if info is not None:
+                self.cache.set(track_id, info)
+            for future in pending[track_id]:
+                if not future.done():
+                    future.set_result(info)
+
+    def stats(self) -> Dict:
+        return {
+            'batches': self.batches,
+            'batched_ids': self.batched_ids,
+            'avg_batch_size': self.batched_ids / self.batches if self.batches else 0,
+            'cache': self.cache.stats()
+        }
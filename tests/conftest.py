@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the `src` package importable when running pytest from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
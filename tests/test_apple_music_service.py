@@ -0,0 +1,41 @@
+import asyncio
+from unittest import mock
+import pytest
+
+pytest.importorskip("applemusicpy")
+pytest.importorskip("jwt")
+ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+
+from src.services.apple_music_service import AppleMusicService
+
+def make_service(**credentials):
+    key = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    return AppleMusicService({'secret_key': key, 'key_id': 'KEY', 'team_id': 'TEAM', **credentials})
+
+def test_create_playlist_posts_to_the_user_library():
+    service = make_service(user_token='user-token')
+    response = mock.Mock()
+    response.json.return_value = {'data': [{'id': 'p.123', 'type': 'library-playlists'}]}
+    with mock.patch.object(service.am._session, 'request', return_value=response) as request:
+        playlist_id = asyncio.run(service.create_playlist('Moodify - HAPPY', ['1', '2']))
+
+    assert playlist_id == 'p.123'
+    method, url = request.call_args.args
+    kwargs = request.call_args.kwargs
+    assert (method, url) == ('POST', 'https://api.music.apple.com/v1/me/library/playlists')
+    assert kwargs['headers']['Music-User-Token'] == 'user-token'
+    assert kwargs['headers']['Authorization'].startswith('Bearer ')
+    assert kwargs['json']['attributes']['name'] == 'Moodify - HAPPY'
+    assert kwargs['json']['relationships']['tracks']['data'] == [
+        {'id': '1', 'type': 'songs'}, {'id': '2', 'type': 'songs'}
+    ]
+
+def test_create_playlist_requires_a_user_token():
+    service = make_service()
+    with pytest.raises(ValueError):
+        asyncio.run(service.create_playlist('Moodify - HAPPY', ['1']))
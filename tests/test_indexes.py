@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("motor")
+
+from src.core.database import Collections
+from src.core.indexes import INDEXES, check_query_plans, diff_indexes, ensure_indexes
+
+class FakeCollection:
+    def __init__(self, indexes):
+        self.indexes = {'_id_': {'key': [('_id', 1)]}, **indexes}
+        self.calls = []
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_indexes(self, models):
+        for model in models:
+            document = dict(model.document)
+            self.indexes[document.pop('name')] = {**document, 'key': list(document['key'].items())}
+        self.calls.append(('create', [model.document['name'] for model in models]))
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+        self.calls.append(('drop', name))
+
+def make_db(moods):
+    return {name: FakeCollection(moods if name == Collections.MOODS else {}) for name in INDEXES}
+
+def test_missing_indexes_are_created_and_extra_ones_kept():
+    db = make_db({
+        'timestamp_id': {'key': [('timestamp', -1), ('_id', -1)]},
+        'legacy_custom': {'key': [('context', 1)]}
+    })
+    plan = asyncio.run(ensure_indexes(db))
+    moods = db[Collections.MOODS]
+    assert 'timestamp_id' not in plan[Collections.MOODS]['missing']
+    assert plan[Collections.MOODS]['extra'] == ['legacy_custom']
+    assert [call[0] for call in moods.calls] == ['create']
+    assert 'legacy_custom' in moods.indexes
+    # A second run has nothing left to do
+    plan = asyncio.run(ensure_indexes(db))
+    assert not any(plan[name][change] for name in plan for change in ('missing', 'changed'))
+
+def test_special_index_types_are_compared_as_is():
+    db = make_db({
+        'notes_text': {'key': [('_fts', 'text'), ('_ftsx', 1)]},
+        'timestamp_id': {'key': [('timestamp', -1.0), ('_id', -1.0)]}
+    })
+    plan = asyncio.run(diff_indexes(db))
+    assert plan[Collections.MOODS]['extra'] == ['notes_text']
+    assert 'timestamp_id' not in plan[Collections.MOODS]['changed']
+
+class ExplainCursor:
+    def __init__(self, plan):
+        self.plan = plan
+        self.sorted = False
+
+    def limit(self, n):
+        return self
+
+    def sort(self, sort):
+        self.sorted = True
+        return self
+
+    async def explain(self):
+        return {'queryPlanner': {'winningPlan': self.plan(self.sorted)}}
+
+class ExplainCollection:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def find(self, query):
+        return ExplainCursor(self.plan)
+
+def test_collection_scans_and_in_memory_sorts_are_reported():
+    index_scan = {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'mood_id'}}
+    db = {
+        Collections.MOODS: ExplainCollection(
+            lambda sorted: {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}} if sorted
+            else {'stage': 'COLLSCAN'}
+        ),
+        Collections.JOURNALS: ExplainCollection(
+            lambda sorted: {'stage': 'SORT', 'inputStage': index_scan}
+        ),
+        Collections.PLAYLISTS: ExplainCollection(lambda sorted: index_scan)
+    }
+    problems = asyncio.run(check_query_plans(db))
+    found = {}
+    for problem in problems:
+        found.setdefault(problem.split(' ')[0], []).append(problem.rsplit(': ', 1)[1])
+    # Every moods query scans; the four sorted ones also sort in memory
+    assert sorted(found[Collections.MOODS]) == ['collection scan'] * 5 + ['in-memory sort'] * 4
+    assert found[Collections.JOURNALS] == ['in-memory sort'] * 2
+    assert Collections.PLAYLISTS not in found
@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+
+pytest.importorskip("bson")
+pytest.importorskip("pymongo")
+
+from src.services.jobs import JobStatus, PermanentJobError, PlaylistJobQueue
+
+class Result:
+    matched_count = 1
+
+class RecordingCollection:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+        return Result()
+
+def run_job(handler, attempts=1, lease_seconds=300):
+    collection = RecordingCollection()
+    queue = PlaylistJobQueue(collection, handler, lease_seconds=lease_seconds)
+    job = {'_id': 1, 'payload': {}, 'attempts': attempts, 'max_attempts': 3}
+    asyncio.run(queue._run(job))
+    return collection.updates
+
+def test_transient_errors_are_retried():
+    async def handler(payload):
+        raise ConnectionError("upstream down")
+    query, update = run_job(handler)[-1]
+    assert query == {'_id': 1, 'attempts': 1}
+    assert update['$set']['status'] == JobStatus.QUEUED
+
+def test_permanent_errors_fail_at_once():
+    async def handler(payload):
+        raise PermanentJobError("Mood entry 1 not found")
+    _, update = run_job(handler)[-1]
+    assert update['$set']['status'] == JobStatus.FAILED
+
+def test_lease_is_renewed_while_the_handler_runs():
+    async def handler(payload):
+        await asyncio.sleep(0.05)
+        return {}
+    updates = run_job(handler, lease_seconds=0.03)
+    renewals = [u for _, u in updates if 'lease_expires' in u['$set']]
+    assert renewals
+    assert updates[-1][1]['$set']['status'] == JobStatus.SUCCEEDED
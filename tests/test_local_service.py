@@ -0,0 +1,22 @@
+import asyncio
+from src.services.local_service import LocalMusicService, TrackCatalog
+
+CATALOG = """id,name,artist,url,valence,energy,tempo,popularity
+a,Sunny,X,u1,0.8,0.7,120,50
+b,Grey,Y,u2,0.2,0.3,80,
+c,Mild,Z,u3,0.5,0.5,100,25
+"""
+
+def test_blank_popularity_cells_count_as_zero(tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text(CATALOG)
+    catalog = TrackCatalog.load(str(path))
+    assert catalog.popularity.tolist() == [1.0, 0.0, 0.5]
+
+def test_recommendations_have_the_common_track_shape(tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text(CATALOG)
+    service = LocalMusicService({'catalog_path': str(path)})
+    tracks = asyncio.run(service.get_recommendations('HAPPY'))
+    assert len(tracks) == 3
+    assert all(set(track) == {'id', 'name', 'artist', 'url'} for track in tracks)
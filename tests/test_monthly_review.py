@@ -0,0 +1,49 @@
+from datetime import datetime
+import pytest
+
+# The API module needs the full runtime stack
+for module in ('fastapi', 'httpx', 'motor', 'bson', 'spotipy', 'applemusicpy', 'jwt', 'dotenv'):
+    pytest.importorskip(module)
+
+from fastapi.testclient import TestClient
+from src.api import routes
+from src.core.journal import JournalManager, JournalEntry
+from src.core.mood_tracker import MoodEntry, MoodLevel
+from src.core.repository import InMemoryJournalRepository
+
+@pytest.fixture
+def client(monkeypatch):
+    manager = JournalManager()
+    monkeypatch.setattr(routes, "journal_repository", InMemoryJournalRepository(manager))
+    timestamp = datetime(2025, 3, 4, 9, 30)
+    entry = JournalEntry(
+        mood_entry=MoodEntry(MoodLevel.HAPPY, timestamp),
+        text="Good day",
+        timestamp=timestamp,
+        tags=["grateful"]
+    )
+    entry.add_liked_song({
+        "id": "spotify:track:123",
+        "name": "Happy",
+        "artist": "Pharrell Williams",
+        "url": "https://open.spotify.com/track/123"
+    })
+    entry.add_memorable_lyrics("Clap along if you feel...", "Happy")
+    manager.add_entry(entry)
+    # Not used as a context manager, so startup hooks (database etc.) don't run
+    return TestClient(routes.app)
+
+def test_monthly_review_then_not_modified(client):
+    response = client.get("/monthly-review/2025/3")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["mood_trends"]["mood_distribution"] == {"HAPPY": 1}
+    assert body["mood_trends"]["average_mood"] == MoodLevel.HAPPY.value
+    assert body["memorable_lyrics"][0]["text"] == "Clap along if you feel..."
+    assert body["favorite_songs"][0]["id"] == "spotify:track:123"
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    repeat = client.get("/monthly-review/2025/3", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == etag
@@ -0,0 +1,66 @@
+import random
+from datetime import datetime, timedelta
+from src.core.mood_tracker import MoodTracker, MoodEntry, MoodLevel
+
+CONTEXTS = [None, 'work', 'home', 'gym', 'commute']
+ACTIVITIES = ['run', 'read', 'cook', 'code', 'sleep']
+
+def make_entries(count, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    entries = [
+        MoodEntry(
+            mood=rng.choice(list(MoodLevel)),
+            timestamp=base + timedelta(minutes=rng.randrange(60 * 24 * 45)),
+            context=rng.choice(CONTEXTS),
+            activities=rng.sample(ACTIVITIES, rng.randrange(3))
+        )
+        for _ in range(count)
+    ]
+    # Mostly chronological, with some backdated entries mixed in
+    entries.sort(key=lambda e: e.timestamp)
+    for _ in range(count // 20):
+        i, j = rng.randrange(count), rng.randrange(count)
+        entries[i], entries[j] = entries[j], entries[i]
+    return entries
+
+def assert_same_trends(trends, expected):
+    assert trends == expected
+    # Key order shows in the JSON response, so it must match too
+    for key in ('mood_distribution', 'common_contexts', 'common_activities'):
+        assert list(trends[key]) == list(expected[key])
+
+def test_trends_match_full_scan():
+    tracker = MoodTracker()
+    rng = random.Random(1)
+    entries = make_entries(2000)
+    for i, entry in enumerate(entries):
+        tracker.add_entry(entry)
+        if i % 100 == 0:
+            start = datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(-600, 60 * 24 * 45))
+            end = start + timedelta(minutes=rng.randrange(60 * 24 * 30))
+            assert_same_trends(
+                tracker.get_mood_trends(start, end),
+                tracker._scan_mood_trends(tracker.get_entries_by_date(start, end))
+            )
+
+def test_trends_match_full_scan_on_day_boundaries():
+    tracker = MoodTracker()
+    for entry in make_entries(1000, seed=2):
+        tracker.add_entry(entry)
+    for start, end in [
+        (datetime(2025, 1, 1), datetime(2025, 2, 1)),
+        (datetime(2025, 1, 3), datetime(2025, 1, 4)),
+        (datetime(2025, 1, 3, 12), datetime(2025, 1, 20, 6)),
+        (datetime(2024, 12, 1), datetime(2025, 3, 1))
+    ]:
+        assert_same_trends(
+            tracker.get_mood_trends(start, end),
+            tracker._scan_mood_trends(tracker.get_entries_by_date(start, end))
+        )
+
+def test_verify_mode_accepts_incremental_result():
+    tracker = MoodTracker(verify_trends=True)
+    for entry in make_entries(500, seed=3):
+        tracker.add_entry(entry)
+    tracker.get_mood_trends(datetime(2025, 1, 2, 8), datetime(2025, 2, 10, 17))
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from src.core.columnar import JournalStore, MoodStore
+from src.core.journal import JournalEntry
+from src.core.mood_tracker import MoodEntry, MoodLevel, MoodTracker
+from src.core.persistence import DirectoryLocked, EntryLog
+from src.core.repository import InMemoryMoodRepository
+
+def make_entry(i):
+    return MoodEntry(
+        mood=list(MoodLevel)[i % len(MoodLevel)],
+        timestamp=datetime(2025, 1, 1) + timedelta(minutes=i),
+        context='work' if i % 2 else None,
+        activities=['run'] if i % 3 else []
+    )
+
+def open_log(directory, **kwargs):
+    log = EntryLog(directory, MoodStore, MoodEntry.from_dict, fsync='never', **kwargs)
+    return log, log.open()
+
+def test_background_compaction_keeps_every_entry(tmp_path):
+    log, _ = open_log(tmp_path, compact_every=10)
+    for i in range(35):
+        log.append(make_entry(i))
+    # Crash without close(): the last sealed logs may not be compacted yet
+    log._compaction.join()
+    log._lock_file.close()
+
+    log, store = open_log(tmp_path, compact_every=10)
+    assert [row.to_dict() for row in store.entries] == [make_entry(i).to_dict() for i in range(35)]
+    log.close()
+
+    log, store = open_log(tmp_path)
+    assert log.startup['log_rows_replayed'] == 0
+    assert len(store) == 35
+    log.close()
+
+def test_second_writer_fails_fast(tmp_path):
+    log, _ = open_log(tmp_path)
+    with pytest.raises(DirectoryLocked):
+        open_log(tmp_path)
+    log.close()
+    other, _ = open_log(tmp_path)
+    other.close()
+
+def test_interval_policy_syncs_only_pending_entries(tmp_path):
+    log = EntryLog(tmp_path, MoodStore, MoodEntry.from_dict, fsync='interval', fsync_interval=0)
+    log.open()
+    assert not log.sync_due()
+    log.append(make_entry(0))
+    assert log.sync_due()
+    log.sync()
+    # Nothing new to force to disk, however often the owner asks
+    assert not log.sync_due()
+    log.close()
+
+def test_repository_restores_history_off_the_loop(tmp_path):
+    async def write():
+        tracker = MoodTracker()
+        tracker.attach_log(EntryLog(tmp_path, MoodStore, MoodEntry.from_dict, fsync='always'))
+        repository = InMemoryMoodRepository(tracker)
+        for i in range(5):
+            await repository.add(make_entry(i))
+        tracker.log.close()
+        return tracker.log.fsyncs
+
+    async def read():
+        tracker = MoodTracker()
+        tracker.attach_log(EntryLog(tmp_path, MoodStore, MoodEntry.from_dict))
+        repository = InMemoryMoodRepository(tracker)
+        await repository.ready()
+        assert tracker._pending is None
+        assert tracker.log.startup['hydrated_rows'] == 5
+        assert tracker.log.startup['ready_seconds'] >= tracker.log.startup['total_seconds']
+        entries = await repository.find_range(datetime(2025, 1, 1), datetime(2025, 1, 2))
+        tracker.log.close()
+        return entries
+
+    assert asyncio.run(write()) >= 5
+    assert [e.to_dict() for e in asyncio.run(read())] == [make_entry(i).to_dict() for i in range(5)]
+
+def test_stores_restore_the_same_entries_as_row_views():
+    moods = MoodStore()
+    journal = JournalStore()
+    # Out of time order, so restoring has to follow the time index
+    for i in (3, 0, 2, 1, 4):
+        entry = JournalEntry(mood_entry=make_entry(i), text=f"día {i}",
+                             timestamp=make_entry(i).timestamp, tags=['t'] * (i % 2))
+        entry.add_liked_song({'id': f'song{i % 2}', 'name': 'Song'})
+        if i % 2:
+            entry.add_memorable_lyrics("la la", "Song")
+        moods.add_entry(entry.mood_entry)
+        journal.add_entry(entry)
+
+    assert [e.to_dict() for e in moods.to_entries()] == [r.to_dict() for r in moods.entries]
+    assert [e.to_dict() for e in journal.to_entries()] == [r.to_dict() for r in journal.entries]
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+
+# The API module needs the full runtime stack
+for module in ('fastapi', 'httpx', 'motor', 'bson', 'spotipy', 'applemusicpy', 'jwt', 'dotenv'):
+    pytest.importorskip(module)
+
+from pymongo.errors import BulkWriteError
+from src.api import routes
+from src.api.models import MusicServiceEnum, PlaylistBatchRequest
+from src.services.scheduler import BACKGROUND, current_priority
+
+class FailingCollection:
+    async def insert_many(self, records, ordered=True):
+        assert not ordered
+        raise BulkWriteError({'writeErrors': [{'index': 1, 'errmsg': 'duplicate key'}]})
+
+async def fake_record(db, payload):
+    return {'mood_id': payload['mood_id'], 'playlist_data': {'playlist_id': payload['mood_id']}}
+
+def test_partial_insert_failures_are_counted_per_item(monkeypatch):
+    monkeypatch.setattr(routes, "build_playlist_record", fake_record)
+    request = PlaylistBatchRequest(
+        items=[{'mood_id': str(i), 'intent': 'improve'} for i in range(3)],
+        concurrency=1
+    )
+
+    async def run():
+        batch = routes.run_playlist_batch(
+            request, MusicServiceEnum.SPOTIFY, {routes.Collections.PLAYLISTS: FailingCollection()}
+        )
+        return [result async for result in batch]
+
+    results = asyncio.run(run())
+    summary = results.pop()['summary']
+    assert (summary['succeeded'], summary['insert_errors'], summary['failed']) == (2, 1, 0)
+    assert sorted(r['status'] for r in results) == ['error', 'success', 'success']
+
+class OpenCircuitGenerator:
+    async def generate_mood_playlist(self, mood, intent, context=None):
+        return {'playlist_id': None, 'tracks': [{'id': '1'}]}
+
+class RecordingCollection:
+    def __init__(self):
+        self.records = []
+
+    async def insert_many(self, records, ordered=True):
+        self.records.extend(records)
+
+def test_playlists_not_created_are_reported_as_errors(monkeypatch):
+    monkeypatch.setattr(routes, "get_playlist_generator", lambda service_type: OpenCircuitGenerator())
+    request = PlaylistBatchRequest(
+        items=[{'mood_id': '1', 'mood': 'HAPPY', 'intent': 'improve'}],
+        concurrency=1
+    )
+    playlists = RecordingCollection()
+
+    async def run():
+        batch = routes.run_playlist_batch(
+            request, MusicServiceEnum.SPOTIFY, {routes.Collections.PLAYLISTS: playlists}
+        )
+        return [result async for result in batch]
+
+    results = asyncio.run(run())
+    summary = results.pop()['summary']
+    assert (summary['succeeded'], summary['failed']) == (0, 1)
+    assert [r['status'] for r in results] == ['error']
+    assert playlists.records == []
+
+def test_batch_items_run_at_background_priority(monkeypatch):
+    priorities = []
+
+    async def record(db, payload):
+        priorities.append(current_priority.get())
+        return await fake_record(db, payload)
+
+    monkeypatch.setattr(routes, "build_playlist_record", record)
+    request = PlaylistBatchRequest(items=[{'mood_id': '1', 'intent': 'improve'}], concurrency=1)
+
+    async def run():
+        batch = routes.run_playlist_batch(
+            request, MusicServiceEnum.SPOTIFY, {routes.Collections.PLAYLISTS: RecordingCollection()}
+        )
+        return [result async for result in batch]
+
+    asyncio.run(run())
+    assert priorities == [BACKGROUND]
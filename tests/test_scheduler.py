@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import pytest
+from src.services.scheduler import UpstreamScheduler
+
+class ServerError(Exception):
+    http_status = 503
+
+def flaky(calls, failures):
+    def func():
+        calls.append(None)
+        if len(calls) <= failures:
+            raise ServerError()
+        return 'ok'
+    return func
+
+def test_reads_are_retried():
+    scheduler = UpstreamScheduler(base_delay=0)
+    calls = []
+    assert asyncio.run(scheduler.call('test', flaky(calls, 2))) == 'ok'
+    assert len(calls) == 3
+
+def test_writes_are_not_retried_after_server_errors():
+    scheduler = UpstreamScheduler(base_delay=0)
+    calls = []
+    with pytest.raises(ServerError):
+        asyncio.run(scheduler.call('test', flaky(calls, 2), idempotent=False))
+    assert len(calls) == 1
+
+class NotFound(Exception):
+    http_status = 404
+
+def test_client_errors_do_not_open_the_circuit():
+    scheduler = UpstreamScheduler()
+    breaker = scheduler._lane('test').breaker
+
+    def missing():
+        raise NotFound()
+
+    async def lookups():
+        for _ in range(breaker.min_calls * 2):
+            with pytest.raises(NotFound):
+                await scheduler.call('test', missing)
+
+    asyncio.run(lookups())
+    assert breaker.state == breaker.CLOSED
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_finishes():
+    scheduler = UpstreamScheduler(max_concurrency=1)
+    lane = scheduler._lane('test')
+    lane.breaker.timeout = 0.01
+    finished = threading.Event()
+
+    def slow():
+        finished.wait(1)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.call('test', slow)
+        assert lane.gate.active == 1
+        finished.set()
+        await asyncio.sleep(0.05)
+        assert lane.gate.active == 0
+
+    asyncio.run(run())
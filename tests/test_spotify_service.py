@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+
+pytest.importorskip("spotipy")
+pytest.importorskip("requests")
+
+from src.services.scheduler import UpstreamRateLimited, UpstreamScheduler
+from src.services import music_service
+from src.services.spotify_service import SpotifyService
+
+class Upstream(BaseHTTPRequestHandler):
+    """Answers every request with `status` and `headers_out`"""
+    status = 200
+    headers_out = {}
+    requests = 0
+
+    def _answer(self):
+        type(self).requests += 1
+        status, headers = self.status, self.headers_out
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        body = b'{"error": {"status": %d, "message": "upstream"}}' % status
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server = HTTPServer(('127.0.0.1', 0), Upstream)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    Upstream.requests = 0
+    service = SpotifyService({'client_id': 'id', 'client_secret': 'secret',
+                              'redirect_uri': 'http://localhost/callback'})
+    service.sp._auth = 'token'
+    service.sp.prefix = f'http://127.0.0.1:{server.server_port}/v1/'
+    scheduler = UpstreamScheduler(base_delay=0, max_retries=2)
+    monkeypatch.setattr(music_service, 'get_scheduler', lambda: scheduler)
+    yield service
+    server.shutdown()
+
+def test_server_errors_surface_as_such_and_writes_are_not_retried(upstream):
+    Upstream.status, Upstream.headers_out = 503, {}
+    with pytest.raises(Exception) as error:
+        asyncio.run(upstream._call(upstream.sp.user_playlist_create, 'me', 'Moodify',
+                                   idempotent=False))
+    assert error.value.http_status == 503
+    assert Upstream.requests == 1
+
+def test_rate_limits_keep_their_retry_after(upstream):
+    Upstream.status, Upstream.headers_out = 429, {'Retry-After': '0'}
+    with pytest.raises(UpstreamRateLimited) as error:
+        asyncio.run(upstream._call(upstream.sp.track, '1'))
+    assert error.value.retry_after == 0
+    assert Upstream.requests == 3